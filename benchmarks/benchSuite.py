@@ -0,0 +1,162 @@
+"""
+###############################################################################
+Code for benchmarking the financial tools against a baseline.
+###############################################################################
+
+Usage (from the repository root):
+    python benchmarks/benchSuite.py --save benchmarks/baseline.json
+    python benchmarks/benchSuite.py --compare benchmarks/baseline.json --threshold 0.2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import numpy as np
+
+REPODIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPODIR)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from importTime import importTime
+from src.financialTools.houseOwnCost import homeOwnership, renting, rentVSbuy
+from src.financialTools.investments import investment, incomeDist
+from src.financialTools.incomeTax import incomeTax_federal_FY2023, incomeTax_CA_FY2023
+from src.financialTools.sweep import rentVSbuySweep
+CODENAME = 'benchSuite'
+
+TERMS = [15, 30, 40]
+
+# %% Cases ####################################################################
+def getBankCost(term):
+    homeOwnership(1E6, 2E5, 6.5/100, mortgageTerm = term, lazy = True).getBankCost()
+
+def getMortgage(term):
+    """ Lazy homeOwnership with the bank cost getTaxCredit reads. """
+    house = homeOwnership(1E6, 2E5, 6.5/100, mortgageTerm = term, lazy = True)
+    house.cost_PM_debt, house.cost_PM_prnc
+    return house
+
+def getTaxCredit(house):
+    house.getTaxCredit(annualIncome = house.annualIncome, taxStatus = house.taxStatus, taxYear = house.taxYear)
+
+def lossMap():
+    rentVSbuySweep(outputs = ['unrecoverCost_CM'], months = [12, 60, -1], \
+                   mortgageRate = np.linspace(0.1, 10, 50)/100, housePrice = np.linspace(0.5, 3, 50)*1E6, \
+                   downPayRate = 0.2, startRent = 4050, realEstateAppRate = 4.16/100, \
+                   annualIncome = 500E3, invstAppRate = 5/100, rentAppRate = 5/100)
+
+def rateVar():
+    for housePrice in np.linspace(0.5, 1.5, 5)*1E6:
+        model = rentVSbuy(housePrice, housePrice*0.2, 4050, mortgageRate = np.linspace(1, 8, 100)/100, \
+                          realEstateAppRate = 4.16/100, annualIncome = 400E3, invstAppRate = 6/100, lazy = True)
+        model.buyLoss, model.brekEvenPoint
+
+def getCases():
+    """ Benchmark name -> function of no arguments, or (setup, function) with
+    the function timed on what setup returns.
+    """
+    cases = {}
+    for term in TERMS:
+        cases[f'homeOwnership_{term}y'] = lambda term = term: homeOwnership(1E6, 2E5, 6.5/100, mortgageTerm = term)
+        cases[f'getBankCost_{term}y']   = lambda term = term: getBankCost(term)
+        cases[f'getTaxCredit_{term}y']  = (lambda term = term: getMortgage(term), getTaxCredit)
+        cases[f'renting_{term}y']       = lambda term = term: renting(4050, rentTerm = term)
+        cases[f'rentVSbuy_{term}y']     = lambda term = term: rentVSbuy(1E6, 2E5, 4050, term = term)
+        cases[f'investment_{term}y']    = lambda term = term: investment(1E3*np.ones((term*12+1,)))
+        cases[f'incomeTax_{term}y']     = lambda term = term: (incomeTax_federal_FY2023(4E5*np.ones((term,))), \
+                                                               incomeTax_CA_FY2023(4E5*np.ones((term,))))
+        cases[f'incomeDist_{term}y']    = lambda term = term: incomeDist(2E5, term_years = term)
+    cases['lossMap'] = lossMap
+    cases['rateVar'] = rateVar
+    return cases
+
+# %% Measurements #############################################################
+def timeCalls(func, number, setup = None):
+    """ Wall time (s) of number calls, each on a fresh setup() made outside
+    of the timing if setup is given.
+    """
+    if setup is None:
+        t0 = time.perf_counter()
+        for jj in range(number):
+            func()
+        return time.perf_counter() - t0
+    total = 0
+    for jj in range(number):
+        arg   = setup()
+        t0    = time.perf_counter()
+        func(arg)
+        total += time.perf_counter() - t0
+    return total
+
+def timeCase(func, repeats = 5, minTime = 0.2, setup = None):
+    """ Median wall time (s) per call over repeats runs of enough calls to
+    last about minTime.
+    """
+    timeCalls(func, 1, setup)
+    number = max(1, int(minTime/max(timeCalls(func, 1, setup), 1E-9)))
+    times  = [timeCalls(func, number, setup)/number for ii in range(repeats)]
+    return float(np.median(times))
+
+def peakMemory(func, setup = None):
+    """ Peak memory (bytes) allocated through Python during one call. """
+    args = () if setup is None else (setup(),)
+    tracemalloc.start()
+    try:
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def runSuite(names = None, repeats = 5):
+    cases   = getCases()
+    results = {}
+    for name, func in cases.items():
+        if names is not None and not any(x in name for x in names):
+            continue
+        setup, func   = func if isinstance(func, tuple) else (None, func)
+        results[name] = {'time_s': timeCase(func, repeats, setup = setup), 'peakMem_B': peakMemory(func, setup)}
+        print(f"{name:24s} {results[name]['time_s']*1E3:10.3f} ms {results[name]['peakMem_B']/1E6:10.2f} MB")
+    name = 'importTime'
+    if names is None or any(x in name for x in names):
+        results[name] = {'time_s': importTime(repeats)['headless_s']}
+        print(f"{name:24s} {results[name]['time_s']*1E3:10.3f} ms")
+    return results
+
+def compare(results, baseline, threshold = 0.2):
+    """ Benchmarks slower or larger than the baseline by more than threshold
+    (a fraction), as a list of messages.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric, value in result.items():
+            base = baseline[name].get(metric)
+            if base is not None and base > 0 and value > base*(1 + threshold):
+                regressions.append(f'{name} {metric}: {base:.4g} -> {value:.4g} (+{(value/base - 1)*100:.0f}%)')
+    return regressions
+
+# %% Run ######################################################################
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Benchmark the financial tools.')
+    parser.add_argument('--save', help = 'write the results to this JSON file')
+    parser.add_argument('--compare', help = 'compare against this JSON baseline')
+    parser.add_argument('--threshold', type = float, default = 0.2, help = 'allowed slow down as a fraction')
+    parser.add_argument('--only', nargs = '*', help = 'run the benchmarks whose name contains any of these')
+    parser.add_argument('--repeats', type = int, default = 5)
+    args = parser.parse_args()
+
+    results = runSuite(args.only, args.repeats)
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent = 2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for line in regressions:
+            print('REGRESSION ' + line)
+        if len(regressions) > 0:
+            sys.exit(1)
+        print('No regressions.')
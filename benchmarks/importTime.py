@@ -0,0 +1,48 @@
+"""
+###############################################################################
+Code for benchmarking the import time of the financial tools.
+###############################################################################
+"""
+import os
+import sys
+import subprocess
+import numpy as np
+CODENAME = 'importTime'
+
+REPODIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ['src.financialTools.incomeTax', 'src.financialTools.investments',\
+           'src.financialTools.houseOwnCost']
+
+# %% Common Functions #########################################################
+def timeImport(statement, repeats = 5):
+    """ Median wall time (s) of running statement in a fresh interpreter, net
+    of the interpreter start up and of importing numpy.
+    """
+    code = 'import time, numpy; t0 = time.perf_counter(); ' + statement + \
+           '; print(time.perf_counter() - t0)'
+    times = []
+    for ii in range(repeats):
+        out = subprocess.run([sys.executable, '-c', code], cwd = REPODIR, \
+                             capture_output = True, text = True, check = True)
+        times.append(float(out.stdout.split()[-1]))
+    return float(np.median(times))
+
+def importTime(repeats = 5):
+    """ Import time of the model modules alone, of the model modules with the 
+    plotting layer, and whether matplotlib stays out of a model only import.
+    """
+    models   = '; '.join('import ' + x for x in MODULES)
+    headless = timeImport(models, repeats)
+    plotting = timeImport(models + '; import src.financialTools.plotting', repeats)
+    out = subprocess.run([sys.executable, '-c', models + \
+                          "; import sys; print('matplotlib' in sys.modules)"], \
+                         cwd = REPODIR, capture_output = True, text = True, check = True)
+    return {'headless_s': headless, 'withPlotting_s': plotting, \
+            'matplotlibImported': out.stdout.strip() == 'True'}
+
+# %% Run ######################################################################
+if __name__ == '__main__':
+    result = importTime()
+    print(f"Model modules:                  {result['headless_s']*1E3:8.1f} ms")
+    print(f"Model modules + plotting layer: {result['withPlotting_s']*1E3:8.1f} ms")
+    print(f"matplotlib imported by models:  {result['matplotlibImported']}")
@@ -13,6 +13,7 @@ from matplotlib.gridspec import GridSpec
 
 sys.path.append('../')
 from src.financialTools.investments import incomeDist
+from src.financialTools.allocation import optimizeSplits
 from src.frmtFig import frmtFig 
 
 clrPts, mpl, plt = frmtFig(mpl, plt, FS_title = 18, FS_tickLabel = 18, FS_axisLabel = 18)
@@ -70,6 +71,14 @@ wealth.portfolio.plotGrowth_value(axs1, accounts = 'total')
 axs2 = fig.add_subplot(gs[1,0])
 wealth.portfolio.plotGrowth_value(axs2, accounts = 'all-wrt-total')
 wealth.portfolio.plotGrowth_value(axs2, accounts = 'total')
+# %% Optimal Split ###########################################################
+# Split ratios with the most assets at the end of the term while keeping at
+# most 60% of the assets volatile at the end of every year
+split = optimizeSplits(wealth, glidePath = True, maxVolatileFrac = 0.6)
+print(f'Stocks split ratio: {split.stocks_splitRatio[0]:.2f} -> {split.stocks_splitRatio[-1]:.2f}')
+print(f'CD split ratio:     {split.cd_splitRatio[0]:.2f} -> {split.cd_splitRatio[-1]:.2f}')
+print(f'Assets after {term} years: $ {split.value*1E-6:.2f} M')
+
 #%%
 
 # fig = plt.figure(3,figsize=(12,1*6))
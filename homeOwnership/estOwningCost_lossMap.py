@@ -13,7 +13,7 @@ from matplotlib.colors import TwoSlopeNorm
 
 sys.path.append('../')
 from src.frmtFig import frmtFig 
-from src.financialTools.houseOwnCost import rentVSbuy
+from src.financialTools.sweep import rentVSbuySweep
 clrPts, mpl, plt = frmtFig(mpl, plt, FS_title = 18, FS_tickLabel = 18, FS_axisLabel = 18)
 
 # %% Common Functions #########################################################
@@ -55,24 +55,19 @@ annualIncome        = 500E3
 rentAppRate         = 5/100
 N_mortgageRate      = 50
 N_housePrice        = 50
+sweepStore          = 'estOwningCost_lossMap'    # None keeps the sweep in memory only
 
 
 housePrice = np.linspace(housePrice_start, housePrice_end, N_housePrice)
 mortgageRate = np.linspace(mortgageRate_start, mortgageRate_end, N_mortgageRate)
+lossSweep = rentVSbuySweep(outputs = ['unrecoverCost_CM'], months = [1*12, 5*12, -1], \
+                           mortgageRate = mortgageRate, housePrice = housePrice, \
+                           downPayRate = 0.2, startRent = startRent, term = term, \
+                           realEstateAppRate = realEstateAppRate, taxCredits = True, \
+                           annualIncome = annualIncome, invstAppRate = invstAppRate, \
+                           rentAppRate = rentAppRate, store = sweepStore, overwrite = True)
+loss = np.moveaxis(lossSweep.sel(output = 'unrecoverCost_CM').data, -1, 0)
 housePrice, mortgageRate = np.meshgrid(housePrice, mortgageRate, indexing='xy')
-loss = np.zeros((3,N_housePrice, N_mortgageRate))
-for ii in range(N_housePrice):
-    for jj in range(N_mortgageRate):
-        rentvsbuySet = rentVSbuy(housePrice[ii,jj], 0.2*housePrice[ii,jj], 
-                                 startRent, term = term, realEstateAppRate = realEstateAppRate, 
-                                 mortgageRate = mortgageRate[ii,jj], \
-                                 taxCredits = True, annualIncome = annualIncome, 
-                                 invstAppRate = invstAppRate, rentAppRate = rentAppRate)
-        loss[2,ii,jj] = rentvsbuySet.unrecoverCost_CM[-1]
-        loss[1,ii,jj] = rentvsbuySet.unrecoverCost_CM[5*12]
-        loss[0,ii,jj] = rentvsbuySet.unrecoverCost_CM[1*12]
-        del rentvsbuySet
-
 
 fig, axs = plotLoss(0, 0, loss, 0.010)
 axs.set_title('Loss after 1 Year\n')
@@ -33,14 +33,11 @@ gs  = GridSpec(2,1)
 axs1 = fig.add_subplot(gs[0,0])
 axs2 = fig.add_subplot(gs[1,0])
 for housePrice in housePrices:
-    loss        = np.zeros(np.shape(mortgageRates))
-    breakEvenPt = np.zeros(np.shape(mortgageRates))
-    for ii in range(len(mortgageRates)):    
-        rentvsbuySet = rentVSbuy(housePrice, housePrice*downPayRate, startRent, term = term, \
-                  realEstateAppRate = realEstateAppRate, mortgageRate = mortgageRates[ii], \
-                  taxCredits= True, annualIncome = annualIncome, invstAppRate = invstAppRate)
-        loss[ii]        = rentvsbuySet.buyLoss
-        breakEvenPt[ii] = rentvsbuySet.brekEvenPoint
+    rentvsbuySet = rentVSbuy(housePrice, housePrice*downPayRate, startRent, term = term, \
+              realEstateAppRate = realEstateAppRate, mortgageRate = mortgageRates, \
+              taxCredits= True, annualIncome = annualIncome, invstAppRate = invstAppRate, lazy = True)
+    loss        = rentvsbuySet.buyLoss
+    breakEvenPt = rentvsbuySet.brekEvenPoint
     axs1.plot(mortgageRates*100, -loss*1E-6, '-', \
               linewidth = 4, label = f'House Price = $ {housePrice*1E-6:.2f} M')
     axs2.plot(mortgageRates*100, breakEvenPt/12, '.-', \
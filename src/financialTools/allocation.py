@@ -0,0 +1,116 @@
+"""
+###############################################################################
+Code for optimizing the split of savings in incomeDist.
+###############################################################################
+"""
+
+import logging
+import numpy as np
+from src.financialTools.investments import compoundGrowth
+CODENAME = 'allocation'
+
+SPLIT_ACCOUNTS = [1, 2, 3]      # Savings, CDs and Stocks of incomeDist
+
+# %% Common Functions #########################################################
+def getSplitRatios(x, nMonths, glidePath = False):
+    """ Stocks and CD split ratios of candidates x (..., 2), or (..., 4) for a
+    glide path going linearly from x[..., :2] to x[..., 2:] over the term.
+    The CD ratio is capped so that stocks + cd <= 1 holds exactly in
+    floating point, as incomeDist checks.
+    """
+    if not glidePath:
+        stocks, cd = x[..., 0:1], x[..., 1:2]
+    else:
+        frac       = np.arange(nMonths)/(nMonths - 1)
+        stocks, cd = x[..., 0:1] + (x[..., 2:3] - x[..., 0:1])*frac, x[..., 1:2] + (x[..., 3:4] - x[..., 1:2])*frac
+    cd = np.clip(cd, 0, 1 - stocks)
+    while np.any(stocks + cd > 1):
+        cd = np.where(stocks + cd > 1, np.nextafter(cd, 0), cd)
+    return stocks, cd
+
+def getSplitValues(dist, stocks_splitRatio, cd_splitRatio):
+    """ Value of every account of an incomeDist (*batch, 6, months) for split
+    ratios broadcastable to (..., *batch, months), with any leading axes of
+    candidates. Only Savings, CDs and Stocks depend on the split, and 
+    together they receive what used to go into them, so the other accounts
+    are taken from dist as they are.
+    """
+    remainder = dist.prnc[..., SPLIT_ACCOUNTS, :].sum(axis = -2)
+    stocks    = np.asarray(stocks_splitRatio)*remainder
+    cd        = np.asarray(cd_splitRatio)*remainder
+    prnc      = np.stack(np.broadcast_arrays(remainder - stocks - cd, cd, stocks), axis = -2)
+    prnc[..., 0] = dist.prnc[..., SPLIT_ACCOUNTS, 0]
+    rates     = dist.portfolio.inRts[..., SPLIT_ACCOUNTS]/12
+    values    = dist.portfolio.values_CIP
+    values    = np.broadcast_to(values, np.shape(prnc)[:-2] + np.shape(values)[-2:]).copy()
+    values[..., SPLIT_ACCOUNTS, :] = compoundGrowth(prnc, rates[:, None])
+    return values
+
+# %% Optimal Split ############################################################
+class splitAllocation:
+    """ Optimal split ratios of an incomeDist, per month, and the terminal
+    value of the portfolio they give.
+    """
+    def __init__(self, stocks_splitRatio, cd_splitRatio, value, params):
+        self.stocks_splitRatio = stocks_splitRatio
+        self.cd_splitRatio     = cd_splitRatio
+        self.value             = value
+        self.params            = params
+
+def optimizeSplits(dist, glidePath = False, minLiquidFrac = None, maxVolatileFrac = None, \
+                   minHardCash = None, gridSize = None, nSteps = 10, shrink = 0.5):
+    """ Split ratios maximizing the terminal value_CIP of an incomeDist. The
+    ratios are constant, or with glidePath a linear path from the first to
+    the last month. At the end of every year the liquid fraction of the
+    value needs to be at least minLiquidFrac, the volatile fraction at most
+    maxVolatileFrac and the liquid and non-volatile assets (see
+    getCondAssets) at least minHardCash. Every step evaluates a grid of
+    candidates around the best one so far as one batch, and then shrinks it.
+    A batched incomeDist gets the split of every household, nan where no 
+    candidate is feasible. Returns a splitAllocation, or None if no 
+    candidate is feasible for any household.
+    """
+    nParams  = 4 if glidePath else 2
+    gridSize = (7 if glidePath else 11) if gridSize is None else gridSize
+    nMonths  = dist.term + 1
+    batch    = np.shape(dist.prnc)[:-2]
+    liquid   = dist.portfolio.liquid
+    volatile = dist.portfolio.volatile
+    years    = np.arange(12, nMonths, 12)
+    unit     = np.linspace(0, 1, gridSize)
+    unit     = np.stack(np.meshgrid(*[unit]*nParams, indexing = 'ij'), axis = -1).reshape(-1, nParams)
+    unit     = unit.reshape((-1,) + (1,)*len(batch) + (nParams,))
+
+    lo, hi   = np.zeros(batch + (nParams,)), np.ones(batch + (nParams,))
+    bestX    = np.full(batch + (nParams,), np.nan)
+    bestVal  = np.full(batch, -np.inf)
+    for step in range(nSteps):
+        # Candidates (K, *batch, nParams) ####################################
+        x          = lo + (hi - lo)*unit
+        stocks, cd = getSplitRatios(x, nMonths, glidePath)
+        values     = getSplitValues(dist, stocks, cd)[..., years]
+        total      = values.sum(axis = -2)
+        feasible   = np.all(x[..., 0::2] + x[..., 1::2] <= 1, axis = -1)
+        if minLiquidFrac is not None:
+            feasible &= np.all(values[..., liquid, :].sum(axis = -2) >= minLiquidFrac*total, axis = -1)
+        if maxVolatileFrac is not None:
+            feasible &= np.all(values[..., volatile, :].sum(axis = -2) <= maxVolatileFrac*total, axis = -1)
+        if minHardCash is not None:
+            feasible &= np.all(values[..., liquid & ~volatile, :].sum(axis = -2) >= minHardCash, axis = -1)
+        score = np.where(feasible, total[..., -1], -np.inf)
+        ii    = np.argmax(score, axis = 0)
+        val   = np.take_along_axis(score, ii[None], axis = 0)[0]
+        new   = np.isfinite(val) & (val >= bestVal)
+        bestX[new]   = np.take_along_axis(x, ii[None, ..., None], axis = 0)[0][new]
+        bestVal[new] = val[new]
+        if step == 0 and not np.any(new):
+            logging.error('allocation:optimizeSplits:: no split ratios meet the constraints.')
+            return
+        width = (hi - lo)*shrink/2
+        lo    = np.where(np.isnan(bestX), lo, np.clip(bestX - width, 0, 1))
+        hi    = np.where(np.isnan(bestX), hi, np.clip(bestX + width, 0, 1))
+
+    stocks, cd = getSplitRatios(bestX, nMonths, glidePath)
+    value      = np.where(np.isfinite(bestVal), getSplitValues(dist, stocks, cd).sum(axis = -2)[..., -1], np.nan)
+    return splitAllocation(np.broadcast_to(stocks, batch + (nMonths,)).copy(), \
+                           np.broadcast_to(cd, batch + (nMonths,)).copy(), value, bestX)
@@ -0,0 +1,220 @@
+"""
+###############################################################################
+Code for running batches of scenarios from a config file without a display.
+###############################################################################
+
+Usage (from the repository root):
+    python -m src.financialTools.cli homeOwnership/rentVSbuy_batch.toml
+    python -m src.financialTools.cli batch.json --output batch.parquet --workers 8 --months 12 60 -1
+
+The config (TOML or JSON) names the model, the outputs (dotted attribute
+paths) and the months to keep, the parameters shared by every scenario
+(params), a Cartesian grid of parameters (grid) and a list of scenarios
+(scenarios). Every grid point and every listed scenario, each on top of
+params, is one scenario. downPayRate stands in for downPay.
+"""
+
+import sys
+import json
+import logging
+import argparse
+import itertools
+import numpy as np
+from src.financialTools.houseOwnCost import homeOwnership, renting, rentVSbuy
+from src.financialTools.investments import invstPortfolio, incomeDist
+from src.financialTools.stagedModel import stagedModel
+from src.financialTools.scenarioRunner import getOutput, getMonths, runScenarios
+CODENAME = 'cli'
+
+MODELS = {'rentVSbuy': rentVSbuy, 'homeOwnership': homeOwnership, 'renting': renting, \
+          'incomeDist': incomeDist, 'invstPortfolio': invstPortfolio}
+UNBATCHED_PARAMS = ('taxYear',)     # numeric, but one value per model
+
+# %% Config ###################################################################
+def readConfig(path):
+    """ Config file as a dict, TOML or JSON by its extension. """
+    if path.endswith('.toml'):
+        import tomllib
+        with open(path, 'rb') as file:
+            return tomllib.load(file)
+    with open(path) as file:
+        return json.load(file)
+
+def getScenarios(config):
+    """ Keyword arguments of every scenario of a config: the grid points
+    first, then the listed scenarios, each on top of params.
+    """
+    params    = config.get('params', {})
+    grid      = config.get('grid', {})
+    scenarios = []
+    if len(grid) > 0:
+        for point in itertools.product(*grid.values()):
+            scenarios.append({**params, **dict(zip(grid, point))})
+    for scenario in config.get('scenarios', []):
+        scenarios.append({**params, **scenario})
+    if len(scenarios) == 0:
+        scenarios.append(dict(params))
+    return [getParams(scenario) for scenario in scenarios]
+
+def getParams(scenario):
+    """ Lists become arrays and downPayRate becomes downPay. """
+    params = {name: np.asarray(x) if isinstance(x, list) else x for name, x in scenario.items()}
+    if 'downPayRate' in params:
+        params['downPay'] = params.pop('downPayRate')*np.asarray(params['housePrice'])
+    return params
+
+def isScalar(x):
+    return isinstance(x, (bool, int, float, str, np.number)) or (isinstance(x, np.ndarray) and np.ndim(x) == 0)
+
+# %% Evaluation ###############################################################
+def getGroups(model, scenarios):
+    """ Indices of the scenarios that run as one batched model. For staged
+    models these are the ones differing only in numeric parameters that are
+    not fixedParams, every other model runs one scenario at a time.
+    """
+    if not issubclass(model, stagedModel):
+        return [[ii] for ii in range(len(scenarios))]
+    groups = {}
+    for ii in range(len(scenarios)):
+        scenario = scenarios[ii]
+        if not all(isScalar(x) for x in scenario.values()):
+            groups[('scenario', ii)] = [ii]
+            continue
+        key = tuple((name, None if isBatched(model, name, scenario[name]) else repr(scenario[name])) \
+                    for name in sorted(scenario))
+        groups.setdefault(key, []).append(ii)
+    return list(groups.values())
+
+def isBatched(model, name, x):
+    return isinstance(x, (int, float, np.number)) and not isinstance(x, (bool, np.bool_)) \
+           and name not in model.fixedParams and name not in UNBATCHED_PARAMS
+
+def runGroup(model, scenarios, group):
+    """ One model instance for a group of scenarios. """
+    if len(group) == 1:
+        params = dict(scenarios[group[0]])
+    else:
+        params = {name: np.array([scenarios[ii][name] for ii in group]) if isBatched(model, name, x) else x \
+                  for name, x in scenarios[group[0]].items()}
+    if issubclass(model, stagedModel):
+        params['lazy'] = True
+    return model(**params)
+
+def getLayout(model, scenario, outputs):
+    """ Shape of every output of one scenario without its month axis, and
+    whether it has one. Sets the columns of the table.
+    """
+    instance = runGroup(model, [scenario], [0])
+    layout   = []
+    for output in outputs:
+        shape = np.shape(getOutput(instance, output))
+        layout.append((shape[:-1], True) if len(shape) > 0 else ((), False))
+    return layout
+
+def getColumns(outputs, months, layout):
+    """ Column names: output@month, with the index of every extra axis as
+    output[ii,jj]@month. Outputs without months are output.
+    """
+    columns = []
+    for output, (shape, monthly) in zip(outputs, layout):
+        for index in np.ndindex(shape):
+            name = output + (f'[{",".join(str(x) for x in index)}]' if len(index) > 0 else '')
+            columns += [f'{name}@{month}' for month in months] if monthly else [name]
+    return columns
+
+def evalRows(start, stop, scenarios, model, outputs, months, layout):
+    """ Table rows of the scenarios [start, stop), given as their slice of
+    the scenario list, as an array of shape
+    (stop-start, columns). Months index the last axis of every output, so
+    years for yearly ones. Months past the end of an output are nan and
+    negative months count from its end.
+    """
+    sizes  = [int(np.prod(shape))*(len(months) if monthly else 1) for shape, monthly in layout]
+    result = np.full((stop-start, sum(sizes)), np.nan)
+    for group in getGroups(model, scenarios):
+        instance = runGroup(model, scenarios, group)
+        rows     = np.array(group)
+        col      = 0
+        for output, (shape, monthly), size in zip(outputs, layout, sizes):
+            value = np.asarray(getOutput(instance, output))
+            block = np.full((len(group),) + shape + ((len(months),) if monthly else ()), np.nan)
+            if monthly:
+                month, valid = getMonths(months, np.shape(value)[-1])
+                block[..., valid] = np.broadcast_to(value[..., month[valid]], np.shape(block[..., valid]))
+            else:
+                block[...] = np.broadcast_to(value, np.shape(block))
+            result[rows, col:col+size] = block.reshape(len(group), size)
+            col  += size
+    return result
+
+def runBatch(config, nWorkers = 1, chunkSize = None):
+    """ Table of a config: the scenario index, the scalar parameters shared
+    by every scenario and the outputs, as column name -> 1-D array.
+    """
+    if config.get('model') not in MODELS:
+        logging.error(f'cli:runBatch:: model needs to be one of {list(MODELS)}.')
+        return
+    model     = MODELS[config['model']]
+    outputs   = list(config['outputs'])
+    months    = list(config.get('months', [12, 60, -1]))
+    scenarios = getScenarios(config)
+    layout    = getLayout(model, scenarios[0], outputs)
+    columns   = getColumns(outputs, months, layout)
+    data      = runScenarios(evalRows, len(scenarios), (len(columns),), \
+                             items = scenarios, args = (model, outputs, months, layout), \
+                             nWorkers = nWorkers, chunkSize = chunkSize)
+    table     = {'scenario': np.arange(len(scenarios))}
+    for name in scenarios[0]:
+        if all(name in x and isScalar(x[name]) for x in scenarios):
+            table[name] = np.array([x[name] for x in scenarios])
+    for jj, column in enumerate(columns):
+        table[column] = data[:, jj]
+    return table
+
+# %% Output ###################################################################
+def writeTable(table, path):
+    """ Write a table (column name -> 1-D array) as CSV, or as Parquet for a
+    .parquet path, which needs pyarrow.
+    """
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            logging.error('cli:writeTable:: writing Parquet needs pyarrow.')
+            return
+        pq.write_table(pa.table({name: np.asarray(x) for name, x in table.items()}), path)
+        return path
+    import csv
+    with open(path, 'w', newline = '') as file:
+        writer = csv.writer(file)
+        writer.writerow(list(table))
+        writer.writerows(zip(*[np.asarray(x).tolist() for x in table.values()]))
+    return path
+
+# %% Main #####################################################################
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Run a batch of scenarios from a TOML or JSON config.')
+    parser.add_argument('config', help = 'TOML or JSON config of the batch')
+    parser.add_argument('--output', help = 'CSV or .parquet file of the results (default: output of the config)')
+    parser.add_argument('--workers', type = int, help = 'worker processes (default: workers of the config, or 1)')
+    parser.add_argument('--chunkSize', type = int, help = 'scenarios per chunk of work')
+    parser.add_argument('--months', type = int, nargs = '+', help = 'months to keep, negative from the end')
+    args   = parser.parse_args(argv)
+
+    config = readConfig(args.config)
+    if args.months is not None:
+        config['months'] = args.months
+    output = args.output if args.output is not None else config.get('output')
+    if output is None:
+        logging.error('cli:main:: no output file given.')
+        return 1
+    nWorkers = args.workers if args.workers is not None else config.get('workers', 1)
+    table    = runBatch(config, nWorkers = nWorkers, chunkSize = args.chunkSize or config.get('chunkSize'))
+    if table is None or writeTable(table, output) is None:
+        return 1
+    print(f'{len(table["scenario"])} scenarios of {config["model"]} -> {output}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
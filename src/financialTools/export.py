@@ -0,0 +1,91 @@
+"""
+###############################################################################
+Code for exporting the monthly series of the models as columns.
+###############################################################################
+"""
+
+import logging
+import numpy as np
+CODENAME = 'export'
+
+TABLE_FORMS = ['arrays', 'arrow', 'frame']
+
+# %% Common Functions #########################################################
+def getColumns(series, months):
+    """ Series (name -> (*batch, months) array) as 1-D columns of one row per
+    month, and per batch point of a batched model, flattened in C order
+    into a 'batch' column. A column is a view of its series, sharing its
+    buffer, unless the series needs to be broadcast over the batch or is
+    not contiguous.
+    """
+    batch   = np.broadcast_shapes(*[np.shape(x)[:-1] for x in series.values()])
+    nBatch  = int(np.prod(batch))
+    columns = {}
+    if len(batch) > 0:
+        columns['batch'] = np.repeat(np.arange(nBatch), len(months))
+        columns['month'] = np.tile(months, nBatch)
+    else:
+        columns['month'] = np.asarray(months)
+    for name, x in series.items():
+        columns[name] = np.broadcast_to(x, batch + np.shape(x)[-1:]).reshape(-1)
+    return columns
+
+def toTable(columns, form = 'arrays'):
+    """ Columns as a dict of arrays, a pyarrow Table or a pandas DataFrame.
+    pyarrow and pandas are only imported when asked for, and wrap the
+    columns without copying where they can, and raise an ImportError when 
+    missing.
+    """
+    if form == 'arrays':
+        return columns
+    elif form == 'arrow':
+        try:
+            import pyarrow as pa
+        except ImportError:
+            logging.error('export:toTable:: form arrow needs pyarrow.')
+            raise ImportError("toTable(form = 'arrow') needs pyarrow, which is not installed.")
+        return pa.table({name: pa.array(x) for name, x in columns.items()})
+    elif form == 'frame':
+        try:
+            import pandas as pd
+        except ImportError:
+            logging.error('export:toTable:: form frame needs pandas.')
+            raise ImportError("toTable(form = 'frame') needs pandas, which is not installed.")
+        return pd.DataFrame(columns, copy = False)
+    logging.error(f'export:toTable:: form needs to be one of {TABLE_FORMS}.')
+    raise ValueError(form)
+
+# %% Series Export ############################################################
+class seriesExport:
+    """ Columnar export of a model with months and a getSeries method
+    returning its monthly series, name -> (*batch, months) array.
+    """
+    def toArrays(self):
+        """ Every monthly series as a 1-D column next to month (see
+        getColumns), as a dict of arrays sharing the model's buffers.
+        """
+        return getColumns(self.getSeries(), self.months)
+
+    def toArrow(self):
+        return toTable(self.toArrays(), 'arrow')
+
+    def toFrame(self):
+        return toTable(self.toArrays(), 'frame')
+
+# %% Bulk Export ##############################################################
+def concatScenarios(models, ids = None, form = 'arrays'):
+    """ Columns of many models, one after the other, in one table with a
+    'scenario' column holding ids (default: the index of every model).
+    The models need to have the same series. Every column is one
+    concatenation, nothing is done per row.
+    """
+    tables = [model.toArrays() for model in models]
+    names  = list(tables[0])
+    if any(list(table) != names for table in tables):
+        logging.error('export:concatScenarios:: the models do not have the same series.')
+        raise ValueError('the models do not have the same series.')
+    ids     = np.arange(len(tables)) if ids is None else np.asarray(ids)
+    columns = {'scenario': np.repeat(ids, [len(table['month']) for table in tables])}
+    for name in names:
+        columns[name] = np.concatenate([table[name] for table in tables])
+    return toTable(columns, form)
@@ -6,24 +6,89 @@ Created:    Swarnav Banik on Apr 08, 2024
 """
 
 import numpy as np
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-from matplotlib.gridspec import GridSpec
 CODENAME = 'houseOwncost'
 
 from src.financialTools.incomeTax import incomeTax_federal_FY2023
+from src.financialTools.incomeTax import getIncomeTaxHorizon
 from src.financialTools.investments import investment
-from src.frmtFig import frmtFig 
-clrPts, mpl, plt = frmtFig(mpl, plt, FS_title = 18, FS_tickLabel = 18, FS_axisLabel = 18)
+from src.financialTools.stagedModel import stagedModel
+
+# %% Common Functions #########################################################
+def amortSchedule(housePrice, downPay, mortgageRate, mortgageTerm = 30):
+    """ Closed form amortization of a batch of mortgages.
+    housePrice, downPay, mortgageRate and mortgageTerm (years) are broadcast
+    against each other. Returns the monthly principal, the monthly interest and
+    the cumulative equity fraction, each of shape (*batch, max(term)*12+1).
+    Months past the term of a mortgage carry no payments.
+    """
+    housePrice, downPay, mortgageRate, mortgageTerm = \
+        [np.asarray(x, dtype = float) for x in (housePrice, downPay, mortgageRate, mortgageTerm)]
+    nPay     = np.round(mortgageTerm*12).astype(int)[..., None]
+    months   = np.arange(0, np.max(nPay, initial = 0)+1)
+    loan     = (housePrice - downPay)[..., None]
+    rate     = (mortgageRate/12)[..., None]
+    isZero   = rate == 0
+    rate_nz  = np.where(isZero, 1, rate)
+    
+    # Monthly payment and outstanding balance after k payments ################
+    cost_PM_bank = np.where(isZero, loan/np.maximum(nPay, 1), \
+                            loan*rate_nz/( 1 - ( 1 + rate_nz )**(-nPay) ))
+    k        = np.minimum(months, nPay)
+    growth   = (1 + rate_nz)**k
+    balance  = np.where(isZero, loan - cost_PM_bank*k, \
+                        loan*growth - cost_PM_bank*(growth - 1)/rate_nz)
+    balance_prev = np.concatenate((balance[..., :1], balance[..., :-1]), axis = -1)
+    
+    active        = (months >= 1) & (months <= nPay)
+    cost_PM_debt  = np.where(active, rate*balance_prev, 0)
+    cost_PM_prnc  = np.where(active, cost_PM_bank - cost_PM_debt, 0)
+    equity_CM_frc = (downPay[..., None] + loan - balance)/housePrice[..., None]
+    return np.broadcast_arrays(cost_PM_prnc, cost_PM_debt, equity_CM_frc)
+
+def breakEvenMonth(unrecoverCost_CM):
+    """ Month from which on the unrecoverable cost of buying stays no longer
+    positive, i.e. the month after the last positive one (from month 1),
+    along the last axis. nan where it is still positive at the end.
+    """
+    positive = np.asarray(unrecoverCost_CM)[..., 1:] > 0
+    lastPos  = np.shape(positive)[-1] - 1 - np.argmax(positive[..., ::-1], axis = -1)
+    month    = np.where(np.any(positive, axis = -1), lastPos + 2, 1)
+    return np.where(positive[..., -1], np.nan, month)
+
+def batchCol(x):
+    """ Parameter x with a trailing axis to broadcast against months. """
+    return np.asarray(x, dtype = float)[..., None]
 
 # %%
 
-class homeOwnership:
+class homeOwnership(stagedModel):
     """ Home  Ownership 
+    The parameters may be arrays that broadcast against each other, in which
+    case every monthly series has shape (*batch, mortgageTerm*12+1). With
+    lazy = True every stage waits until one of its outputs is read.
     """
+    stages = {'getMiscCostPA':  ('cost_PM_pTax', 'cost_PM_main'),\
+              'getBankCost':    ('cost_PM_prnc', 'cost_PM_debt', 'equity_CM_frc'),\
+              'getCostCM':      ('cost_CM_pTax', 'cost_CM_main', 'cost_CM_debt', 'cost_CM_prnc'),\
+              'getTaxSavings':  ('cost_PA_debt', 'it_deductions', 'taxSavings_PA', 'taxSavings_PM'),\
+              'getCost':        ('cost_PM', 'cost_CM'),\
+              'getValApp':      ('value_CM',),\
+              'getProfit':      ('equity_CM_val', 'saleValue_CM_val', 'profit_CM'),\
+              'getUnrecoverableCosts': ('hyInvst', 'unrecoverCost_CM')}
+    inputs = {'getMiscCostPA':  ('housePrice', 'propTaxRate', 'maintainRate'),\
+              'getBankCost':    ('housePrice', 'downPay', 'mortgageRate'),\
+              'getCostCM':      ('cost_PM_pTax', 'cost_PM_main', 'cost_PM_debt', 'cost_PM_prnc'),\
+              'getTaxSavings':  ('taxCredits', 'annualIncome', 'taxStatus', 'taxYear', 'cost_PM_debt', 'cost_PM_prnc'),\
+              'getCost':        ('downPay', 'cost_PM_prnc', 'cost_PM_debt', 'cost_PM_pTax', 'cost_PM_main', 'taxSavings_PM'),\
+              'getValApp':      ('housePrice', 'realEstateAppRate'),\
+              'getProfit':      ('housePrice', 'equity_CM_frc', 'value_CM', 'cost_CM'),\
+              'getUnrecoverableCosts': ('invstAppRate', 'cost_PM', 'profit_CM')}
+    fixedParams = ('mortgageTerm',)
+    
     def __init__(self, housePrice, downPay, mortgageRate, mortgageTerm = 30, \
                  propTaxRate = 0.8/100, maintainRate = 1/100, realEstateAppRate = 4.16/100,\
-                 invstAppRate = 6.9/100, taxCredits = True, taxStatus = 'married', annualIncome = 400E3):
+                 invstAppRate = 6.9/100, taxCredits = True, taxStatus = 'married', annualIncome = 400E3,\
+                 taxYear = None, lazy = False):
         self.housePrice         = housePrice
         self.downPay            = downPay
         self.mortgageRate       = mortgageRate
@@ -31,90 +96,93 @@ class homeOwnership:
         self.maintainRate       = maintainRate
         self.realEstateAppRate  = realEstateAppRate
         self.mortgageTerm       = mortgageTerm
-        if self.downPay/self.housePrice < 0.19:
+        self.invstAppRate       = invstAppRate
+        self.taxCredits         = taxCredits
+        self.taxStatus          = taxStatus
+        self.annualIncome       = annualIncome
+        self.taxYear            = taxYear
+        if np.any(np.asarray(self.downPay)/np.asarray(self.housePrice) < 0.19):
             print('Downpayment is less than 20%. The bank may require you to pay PMI. This analysis considers PMI = 0')
         
         # Establish the timeline ##############################################
         self.months  = np.array(range(0, self.mortgageTerm*12+1))
         self.years   = np.array(range(0, self.mortgageTerm+1))
         
-        # Estimate the 'cost' of owning #######################################   
-        self.getMiscCostPA()
-        self.getBankCost() 
-        if taxCredits:
-            self.getTaxCredit(annualIncome = annualIncome, taxStatus = taxStatus)  
-        else:
-            self.taxSavings_PM = np.zeros((self.mortgageTerm*12+1,)) 
-                
-        self.cost_PM = self.cost_PM_prnc + self.cost_PM_debt \
-                     + self.cost_PM_pTax + self.cost_PM_main \
-                     + np.insert( np.zeros((self.mortgageTerm*12,)) , 0, self.downPay )\
-                     - self.taxSavings_PM
-        self.cost_CM = self.cost_PM.cumsum()
-               
-        # Estimate the property and 'equity value' ############################
-        self.getValApp()
-        self.equity_CM_val = self.equity_CM_frc * self.value_CM
-        self.saleValue_CM_val = self.value_CM - self.housePrice*(1-self.equity_CM_frc)
-        
-        # Estimate the net 'profit' made ######################################        
-        #self.profit_CM     = self.equity_CM_val - self.cost_CM
-        self.profit_CM     = self.saleValue_CM_val - self.cost_CM
-       
-        # Estimate unrecoverable costs ########################################  
-        self.getUnrecoverableCosts(invstAppRate = invstAppRate)
+        # Estimate the 'cost', the 'equity value' and the unrecoverable costs 
+        if not lazy:
+            self.runStages()
         
     def getMiscCostPA(self):
-        self.cost_PM_pTax   = np.insert( (self.propTaxRate/12)*self.housePrice*np.ones((self.mortgageTerm*12,)) , 0, 0 )
-        self.cost_PM_main   = np.insert( (self.maintainRate/12)*self.housePrice*np.ones((self.mortgageTerm*12,)), 0, 0 )
-        self.cost_CM_pTax  = self.cost_PM_pTax.cumsum()
-        self.cost_CM_main  = self.cost_PM_main.cumsum()       
+        self.cost_PM_pTax   = batchCol((self.propTaxRate/12)*np.asarray(self.housePrice))*(self.months >= 1)
+        self.cost_PM_main   = batchCol((self.maintainRate/12)*np.asarray(self.housePrice))*(self.months >= 1)
   
         
-    def getBankCost(self):        
-        cost_PM_bank = (self.housePrice - self.downPay)*(self.mortgageRate/12)\
-            /( 1 - ( 1 + (self.mortgageRate/12) )**(-self.mortgageTerm*12) )
-            
-        self.cost_PM_prnc    = np.zeros((self.mortgageTerm*12+1,))
-        self.cost_PM_debt    = np.zeros((self.mortgageTerm*12+1,))
-        self.equity_CM_frc   = np.ones((self.mortgageTerm*12+1,))*self.downPay/self.housePrice
-        for ii in range(1,self.mortgageTerm*12+1):
-            self.cost_PM_debt[ii]   = (self.mortgageRate/12) * \
-                (self.housePrice-self.downPay-np.sum(self.cost_PM_prnc[0:ii]))
-            self.cost_PM_prnc[ii]   = cost_PM_bank - self.cost_PM_debt[ii]
-            self.equity_CM_frc[ii]  = self.equity_CM_frc[ii] + np.sum(self.cost_PM_prnc[0:ii+1])/self.housePrice
-        self.cost_CM_debt = self.cost_PM_debt.cumsum()
-        self.cost_CM_prnc = self.cost_PM_prnc.cumsum()
-        
-    def getTaxCredit(self, annualIncome = 400E3, limit = 750E3, taxStatus = 'married'):       
-        self.cost_PA_debt  = np.zeros((self.mortgageTerm+1,))
-        self.it_deductions = np.zeros((self.mortgageTerm+1,))
-        for ii in range(1,self.mortgageTerm+1):
-            self.cost_PA_debt[ii]   = np.sum(self.cost_PM_debt[1+(ii-1)*12:1+ii*12])
-            self.it_deductions[ii]  = min(self.cost_PA_debt[ii], limit) 
-        self.taxSavings_PA       = np.zeros((self.mortgageTerm+1,))
-        for ii in range(1,self.mortgageTerm):
+    def getBankCost(self):
+        self.cost_PM_prnc, self.cost_PM_debt, self.equity_CM_frc = \
+            amortSchedule(self.housePrice, self.downPay, self.mortgageRate, self.mortgageTerm)
+        
+    def getCostCM(self):
+        self.cost_CM_pTax  = self.cost_PM_pTax.cumsum(axis = -1)
+        self.cost_CM_main  = self.cost_PM_main.cumsum(axis = -1)       
+        self.cost_CM_debt  = self.cost_PM_debt.cumsum(axis = -1)
+        self.cost_CM_prnc  = self.cost_PM_prnc.cumsum(axis = -1)
+        
+    def getTaxCredit(self, annualIncome = 400E3, limit = 750E3, taxStatus = 'married', taxYear = None):       
+        nYears = self.mortgageTerm
+        cost_PA_debt       = self.cost_PM_debt[..., 1:].reshape(np.shape(self.cost_PM_debt)[:-1] + (nYears, 12)).sum(-1)
+        self.cost_PA_debt  = np.insert(cost_PA_debt, 0, 0, axis = -1)
+        self.it_deductions = np.minimum(self.cost_PA_debt, limit)
+        
+        # Savings in year ii+1 come from the interest deducted in year ii #####
+        # FY2023 brackets throughout, or indexed brackets from taxYear on #####
+        annualIncome       = np.asarray(annualIncome)[..., None]
+        if taxYear is None:
             it_noDebt = incomeTax_federal_FY2023(annualIncome, status = taxStatus, addDeductions = 0 ).incomeTax.tax
-            it_ysDebt = incomeTax_federal_FY2023(annualIncome, status = taxStatus, addDeductions = self.it_deductions[ii] ).incomeTax.tax
-            self.taxSavings_PA[ii+1] = it_noDebt - it_ysDebt        
-        self.taxSavings_PM = np.zeros((self.mortgageTerm*12+1,))
-        for ii in range(1,self.mortgageTerm+1):
-            for jj in range(1+12*(ii-1),1+12*ii):
-                self.taxSavings_PM[jj] = min((self.taxSavings_PA[ii] - np.sum(self.taxSavings_PM[1+12*(ii-1):jj])), \
-                                             self.cost_PM_prnc[jj]+self.cost_PM_debt[jj])
+            it_ysDebt = incomeTax_federal_FY2023(annualIncome, status = taxStatus, addDeductions = self.it_deductions[..., 1:nYears] ).incomeTax.tax
+        else:
+            years     = taxYear + np.arange(nYears-1)
+            it_noDebt = getIncomeTaxHorizon(annualIncome, years, 'federal', taxStatus, addDeductions = 0)[0]
+            it_ysDebt = getIncomeTaxHorizon(annualIncome, years, 'federal', taxStatus, addDeductions = self.it_deductions[..., 1:nYears])[0]
+        taxSavings_PA      = it_noDebt - it_ysDebt
+        self.taxSavings_PA = np.concatenate((np.zeros(np.shape(taxSavings_PA)[:-1] + (2,)), taxSavings_PA), axis = -1)
+        
+        # Spread the annual savings over the months, capped by the payments ###
+        payment  = (self.cost_PM_prnc + self.cost_PM_debt)[..., 1:]
+        payment  = payment.reshape(np.shape(payment)[:-1] + (nYears, 12))
+        taxSavings_CM = np.minimum(self.taxSavings_PA[..., 1:, None], payment.cumsum(-1))
+        taxSavings_PM = np.diff(taxSavings_CM, prepend = 0, axis = -1)
+        self.taxSavings_PM = np.insert(taxSavings_PM.reshape(np.shape(taxSavings_PM)[:-2] + (nYears*12,)), 0, 0, axis = -1)
+
+    def getTaxSavings(self):
+        if self.taxCredits:
+            self.getTaxCredit(annualIncome = self.annualIncome, taxStatus = self.taxStatus, taxYear = self.taxYear)  
+        else:
+            self.taxSavings_PM = np.zeros(np.shape(self.cost_PM_prnc)) 
+        
+    def getCost(self):
+        self.cost_PM = self.cost_PM_prnc + self.cost_PM_debt \
+                     + self.cost_PM_pTax + self.cost_PM_main \
+                     + batchCol(self.downPay)*(self.months == 0)\
+                     - self.taxSavings_PM
+        self.cost_CM = self.cost_PM.cumsum(axis = -1)
        
     def getValApp(self):
-        self.value_CM = np.ones((self.mortgageTerm*12+1,))*self.housePrice
-        for ii in range(self.mortgageTerm*12+1):
-            self.value_CM[ii] = self.housePrice * (1+self.realEstateAppRate/12)**ii
+        self.value_CM = batchCol(self.housePrice) * (1+batchCol(self.realEstateAppRate)/12)**self.months
         
+    def getProfit(self):
+        self.equity_CM_val = self.equity_CM_frc * self.value_CM
+        self.saleValue_CM_val = self.value_CM - batchCol(self.housePrice)*(1-self.equity_CM_frc)
+        #self.profit_CM     = self.equity_CM_val - self.cost_CM
+        self.profit_CM     = self.saleValue_CM_val - self.cost_CM
         
-    def getUnrecoverableCosts(self, invstAppRate = 6.9/100):
-        self.invstAppRate  = invstAppRate        
-        self.hyInvst = investment(self.cost_PM, invstAppRate = invstAppRate/12)
+    def getUnrecoverableCosts(self, invstAppRate = None):
+        if invstAppRate is not None:
+            self.invstAppRate = invstAppRate        
+        self.hyInvst = investment(self.cost_PM, invstAppRate = batchCol(self.invstAppRate)/12)
         self.unrecoverCost_CM   = - self.profit_CM + self.hyInvst.profit_CIP
         
     def plotTermTrend(self, figNo):
+        from src.financialTools.plotting import plt, GridSpec
 
         fig = plt.figure(figNo,figsize=(12,1*6))
         gs  = GridSpec(1,1)
@@ -147,57 +215,142 @@ class homeOwnership:
         axs.set(xlim=( -5, 35 ))
         #axs.set(ylim=( -0.1, 4.5 ))     
             
-class renting:
+class renting(stagedModel):
     """ Renting
     Parameters
     ----------
+    startRent, rentAppRate and invstAppRate may be broadcastable arrays.
     """
-    def __init__(self, startRent, rentAppRate = 3.5/100, rentTerm = 30, invstAppRate = 6.9/100):
+    stages = {'getRent':               ('cost_PM', 'cost_CM'),\
+              'getUnrecoverableCosts': ('hyInvst', 'unrecoverCost_CM')}
+    inputs = {'getRent':               ('startRent', 'rentAppRate'),\
+              'getUnrecoverableCosts': ('invstAppRate', 'cost_PM', 'cost_CM')}
+    fixedParams = ('rentTerm',)
+    
+    def __init__(self, startRent, rentAppRate = 3.5/100, rentTerm = 30, invstAppRate = 6.9/100, lazy = False):
         self.startRent     = startRent
         self.rentAppRate   = rentAppRate
         self.rentTerm      = rentTerm
+        self.invstAppRate  = invstAppRate
         
         self.months   = np.array(range(0, self.rentTerm*12+1))
-        self.cost_PM  = np.zeros((self.rentTerm*12+1,))
-        for ii in range(0, self.rentTerm*12+1):            
-            self.cost_PM[ii] = self.startRent * (1+self.rentAppRate)**(np.floor(ii/12))
-        self.cost_CM = self.cost_PM.cumsum()
-        self.getUnrecoverableCosts(invstAppRate = invstAppRate)
-        
-    def getUnrecoverableCosts(self, invstAppRate = 6.9/100):
-        self.invstAppRate  = invstAppRate        
-        self.hyInvst = investment(self.cost_PM, invstAppRate = invstAppRate/12)
+        if not lazy:
+            self.runStages()
+        
+    def getRent(self):
+        self.cost_PM  = batchCol(self.startRent) * (1+batchCol(self.rentAppRate))**(self.months//12)
+        self.cost_CM  = self.cost_PM.cumsum(axis = -1)
+        
+    def getUnrecoverableCosts(self, invstAppRate = None):
+        if invstAppRate is not None:
+            self.invstAppRate = invstAppRate        
+        self.hyInvst = investment(self.cost_PM, invstAppRate = batchCol(self.invstAppRate)/12)
         self.unrecoverCost_CM = self.cost_CM + self.hyInvst.profit_CIP
         
         
-class rentVSbuy:
+# Parameters rentVSbuy hands to its homeOwnership and renting models ########
+HOUSE_PARAMS    = ('housePrice', 'downPay', 'mortgageRate', 'propTaxRate', 'maintainRate', \
+                   'realEstateAppRate', 'invstAppRate')
+HOUSE_TC_PARAMS = ('taxCredits', 'annualIncome', 'taxYear')
+RENTAL_PARAMS   = ('startRent', 'rentAppRate', 'invstAppRate')
+
+class rentVSbuy(stagedModel):
+    """ Renting v/s Buying
+    The parameters other than term may be broadcastable arrays, see 
+    src.financialTools.sweep for evaluating grids of them. With lazy = True
+    every stage, including those of house and rental, waits until one of its
+    outputs is read.
+    Changing a parameter, or withParams, recomputes only what depends on it,
+    e.g. a new rentAppRate leaves house alone.
+    """
+    stages = {'getHouse':              ('house',),\
+              'getHouseNoTC':          ('house_noTC',),\
+              'getRental':             ('rental',),\
+              'getRelBuyCost':         ('relBuyCost_PM', 'relBuyCost_CM'),\
+              'getUnrecoverableCosts': ('hyInvst', 'unrecoverCost_CM'),\
+              'getBreakEven':          ('buyLoss', 'brekEvenPoint')}
+    inputs = {'getHouse':              HOUSE_PARAMS + HOUSE_TC_PARAMS,\
+              'getHouseNoTC':          HOUSE_PARAMS,\
+              'getRental':             RENTAL_PARAMS,\
+              'getRelBuyCost':         ('house', 'rental'),\
+              'getUnrecoverableCosts': ('invstAppRate', 'relBuyCost_PM', 'house'),\
+              'getBreakEven':          ('unrecoverCost_CM',)}
+    children = {'house':      {x: x for x in HOUSE_PARAMS + HOUSE_TC_PARAMS},\
+                'house_noTC': {x: x for x in HOUSE_PARAMS},\
+                'rental':     {x: x for x in RENTAL_PARAMS}}
+    fixedParams = ('term',)
+    
     def __init__(self, housePrice, downPay, startRent, term = 30, \
                  mortgageRate = 7/100, propTaxRate = 0.8/100, maintainRate = 1/100, \
                  realEstateAppRate = 4.16/100, rentAppRate = 5/100,\
-                 invstAppRate = 6.9/100, taxCredits = True, annualIncome = 400E3 ):
-        self.house      = homeOwnership(housePrice, downPay, mortgageRate, mortgageTerm = term, \
-                                   propTaxRate = propTaxRate, maintainRate = maintainRate, \
-                                   realEstateAppRate = realEstateAppRate, invstAppRate = invstAppRate, \
-                                   taxCredits = taxCredits, annualIncome = annualIncome )
-        self.house_noTC = homeOwnership(housePrice, downPay, mortgageRate, mortgageTerm = term, \
-                                   propTaxRate = propTaxRate, maintainRate = maintainRate, \
-                                   realEstateAppRate = realEstateAppRate, invstAppRate = invstAppRate, \
-                                   taxCredits = False )
-        self.rental     = renting(startRent, rentTerm = term, rentAppRate = rentAppRate, invstAppRate = invstAppRate)
+                 invstAppRate = 6.9/100, taxCredits = True, annualIncome = 400E3, taxYear = None,\
+                 lazy = False ):
+        self.housePrice         = housePrice
+        self.downPay            = downPay
+        self.startRent          = startRent
+        self.term               = term
+        self.mortgageRate       = mortgageRate
+        self.propTaxRate        = propTaxRate
+        self.maintainRate       = maintainRate
+        self.realEstateAppRate  = realEstateAppRate
+        self.rentAppRate        = rentAppRate
+        self.invstAppRate       = invstAppRate
+        self.taxCredits         = taxCredits
+        self.annualIncome       = annualIncome
+        self.taxYear            = taxYear
+        self.lazy               = lazy
+        self.months             = np.array(range(0, self.term*12+1))
+        if not lazy:
+            self.runStages()
         
+    def getHouse(self):
+        self.house      = homeOwnership(self.housePrice, self.downPay, self.mortgageRate, mortgageTerm = self.term, \
+                                   propTaxRate = self.propTaxRate, maintainRate = self.maintainRate, \
+                                   realEstateAppRate = self.realEstateAppRate, invstAppRate = self.invstAppRate, \
+                                   taxCredits = self.taxCredits, annualIncome = self.annualIncome, \
+                                   taxYear = self.taxYear, lazy = self.lazy )
+        
+    def getHouseNoTC(self):
+        self.house_noTC = homeOwnership(self.housePrice, self.downPay, self.mortgageRate, mortgageTerm = self.term, \
+                                   propTaxRate = self.propTaxRate, maintainRate = self.maintainRate, \
+                                   realEstateAppRate = self.realEstateAppRate, invstAppRate = self.invstAppRate, \
+                                   taxCredits = False, lazy = self.lazy )
+        
+    def getRental(self):
+        self.rental     = renting(self.startRent, rentTerm = self.term, rentAppRate = self.rentAppRate, \
+                                  invstAppRate = self.invstAppRate, lazy = self.lazy)
+        
+    def getRelBuyCost(self):
         self.relBuyCost_PM = self.house.cost_PM - self.rental.cost_PM
-        self.relBuyCost_CM = self.relBuyCost_PM.cumsum()
-        self.getUnrecoverableCosts(invstAppRate = invstAppRate)
+        self.relBuyCost_CM = self.relBuyCost_PM.cumsum(axis = -1)
 
-    def getUnrecoverableCosts(self, invstAppRate = 6.9/100):
-        self.invstAppRate     = invstAppRate        
-        self.hyInvst          = investment(self.relBuyCost_PM, invstAppRate = invstAppRate/12)
+    def getUnrecoverableCosts(self, invstAppRate = None):
+        if invstAppRate is not None:
+            self.invstAppRate = invstAppRate        
+        self.hyInvst          = investment(self.relBuyCost_PM, invstAppRate = batchCol(self.invstAppRate)/12)
         self.unrecoverCost_CM = self.hyInvst.profit_CIP-self.house.profit_CM 
+
+    def getBreakEven(self):
+        self.buyLoss          = self.unrecoverCost_CM[..., -1]
+        self.brekEvenPoint    = breakEvenMonth(self.unrecoverCost_CM)
+
+    def monteCarlo(self, nPaths = 1000, vols = None, corr = None, \
+                   percentiles = [5, 25, 50, 75, 95], chunkSize = 1000, seed = None):
+        """ Distribution of unrecoverCost_CM and of the break-even month under
+        random home prices, rents and returns, see 
+        src.financialTools.monteCarlo.simulateRentVSbuy.
+        """
+        from src.financialTools.monteCarlo import simulateRentVSbuy, MC_VOLS_RENTVSBUY, MC_CORR_RENTVSBUY
+        return simulateRentVSbuy(self, nPaths = nPaths, \
+                                 vols = MC_VOLS_RENTVSBUY if vols is None else vols, \
+                                 corr = MC_CORR_RENTVSBUY if corr is None else corr, \
+                                 percentiles = percentiles, chunkSize = chunkSize, seed = seed)
        
         
         
         
     def plotTermTrend(self, figNo):
+        from src.financialTools.plotting import plt, GridSpec, clrPts
 
         fig = plt.figure(figNo,figsize=(12,1*6))
         gs  = GridSpec(1,1)
@@ -7,82 +7,174 @@ Created:    Swarnav Banik on Apr 18, 2024
 
 import numpy as np
 import logging
+from functools import lru_cache
 CODENAME = 'incomeTax'
 
-# %%
+# %% Tax Schedules ############################################################
+TAX_BASEYEAR  = 2023
+TAX_INFLRATE  = 2.5/100
+TAX_SCHEDULES = {
+    ('federal', 'single'):  {'brackets_bp': [11000, 44725, 95375, 182100, 231250, 578125],\
+                             'brackets_pc': [10, 12, 22, 24, 32, 35, 37],\
+                             'stdDeductions': 13850},
+    ('federal', 'married'): {'brackets_bp': [22000, 89450, 190750, 364200, 462500, 693750],\
+                             'brackets_pc': [10, 12, 22, 24, 32, 35, 37],\
+                             'stdDeductions': 27700},
+    ('CA', 'single'):       {'brackets_bp': [10412, 24684, 38959, 54081, 68350, 349137, 418961, 698271, 698272],\
+                             'brackets_pc': [1, 2, 4, 6, 8, 9.3, 10.3, 11.3, 12.3],\
+                             'stdDeductions': 5363},
+    ('CA', 'married'):      {'brackets_bp': [20839, 49371, 63644, 78765, 93037, 474824, 569790, 949649],\
+                             'brackets_pc': [1, 2, 4, 6, 8, 9.3, 10.3, 11.3, 12.3],\
+                             'stdDeductions': 10726},
+    }
+
+# %% Common Functions #########################################################
+def bracketTable(brackets_bp, brackets_pc):
+    """ Breakpoints with a leading 0, bracket rates (%) and the cumulative tax
+    owed at every breakpoint. Precompute once per tax schedule. A schedule
+    without a rate above its last breakpoint keeps its last rate there.
+    """
+    bp     = np.concatenate(([0], np.asarray(brackets_bp, dtype = float)))
+    pc     = np.asarray(brackets_pc, dtype = float)
+    pc     = np.concatenate((pc, pc[-1]*np.ones((len(bp)-len(pc),))))
+    cumTax = np.concatenate(([0], np.cumsum(np.diff(bp)*pc[:-1]/100)))
+    return bp, pc, cumTax
+
+def getIncomeTax(income, stdDeductions = 27700, addDeductions = 0, table = None,\
+                 brackets_bp = np.array([22000, 89450, 190750, 364200, 462500, 693750]),\
+                 brackets_pc = np.array([10, 12, 22, 24, 32, 35, 37]) ):
+    """ Vectorized income tax. income and addDeductions are arrays of any
+    broadcastable shape. Returns the tax, the marginal bracket (%), the 
+    effective tax rate and the taxed income, each with the broadcast shape.
+    """
+    if table is None:
+        table = bracketTable(brackets_bp, brackets_pc)
+    bp, pc, cumTax = table
+    income      = np.asarray(income, dtype = float)
+    taxedIncome = np.maximum(income - np.maximum(stdDeductions, addDeductions), 0)
+    idx         = np.searchsorted(bp, taxedIncome, side = 'right') - 1
+    tax         = cumTax[idx] + (taxedIncome - bp[idx])*pc[idx]/100
+    tax, income = np.broadcast_arrays(tax, income)
+    effTaxRate  = np.divide(tax, income, out = np.zeros(np.shape(tax)), where = income != 0)
+    return tax, pc[idx], effTaxRate, taxedIncome
+
+# %% Tax Schedule Registry ####################################################
+class taxSchedule:
+    """ Compiled tax schedule of a jurisdiction, filing status and year. The
+    breakpoints and standard deductions of TAX_SCHEDULES are indexed with
+    inflRate from TAX_BASEYEAR.
+    """
+    def __init__(self, jurisdiction, status, year = TAX_BASEYEAR, inflRate = TAX_INFLRATE):
+        self.jurisdiction  = jurisdiction
+        self.status        = status
+        self.year          = year
+        self.index         = (1 + inflRate)**(year - TAX_BASEYEAR)
+        schedule           = TAX_SCHEDULES[(jurisdiction, status)]
+        self.stdDeductions = schedule['stdDeductions']*self.index
+        self.brackets_bp   = np.asarray(schedule['brackets_bp'], dtype = float)*self.index
+        self.brackets_pc   = np.asarray(schedule['brackets_pc'], dtype = float)
+        self.table         = bracketTable(self.brackets_bp, self.brackets_pc)
+        
+    def getTax(self, income, addDeductions = 0):
+        return getIncomeTax(income, stdDeductions = self.stdDeductions, \
+                            addDeductions = addDeductions, table = self.table)
+
+@lru_cache(maxsize = None)
+def getTaxSchedule(jurisdiction, status, year = TAX_BASEYEAR, inflRate = TAX_INFLRATE):
+    if (jurisdiction, status) not in TAX_SCHEDULES:
+        logging.error(f'incomeTax:getTaxSchedule:: no tax schedule for {jurisdiction} and {status}.')
+        return
+    return taxSchedule(jurisdiction, status, year = int(year), inflRate = inflRate)
+
+@lru_cache(maxsize = None)
+def getTaxScheduleTable(jurisdiction, status, years, inflRate = TAX_INFLRATE):
+    """ Schedules of a tuple of years flattened into one sorted table. Row ii
+    holds year ii with its breakpoints offset by ii*span, so that one
+    searchsorted looks every year up at once. No years give empty arrays.
+    """
+    schedules = [getTaxSchedule(jurisdiction, status, year, inflRate) for year in years]
+    if any(x is None for x in schedules):
+        return
+    if len(years) == 0:
+        schedule = getTaxSchedule(jurisdiction, status, inflRate = inflRate)
+        if schedule is None:
+            return
+        empty = np.zeros((0, np.shape(schedule.table[0])[-1]))
+        return empty, empty, empty, np.zeros(0), np.zeros(0), np.zeros(0)
+    bp     = np.array([x.table[0] for x in schedules])
+    pc     = np.array([x.table[1] for x in schedules])
+    cumTax = np.array([x.table[2] for x in schedules])
+    std    = np.array([x.stdDeductions for x in schedules])
+    span   = 2*np.max(bp) + 1
+    offset = span*np.arange(len(years))
+    return bp, pc, cumTax, std, offset, (bp + offset[:, None]).ravel()
+
+def getIncomeTaxHorizon(income, years, jurisdiction = 'federal', status = 'single', \
+                        addDeductions = 0, inflRate = TAX_INFLRATE):
+    """ Year-by-year income tax over a horizon. The last axis of income and 
+    addDeductions runs over years. Returns the tax, the marginal bracket (%) 
+    and the effective tax rate arrays.
+    """
+    table = getTaxScheduleTable(jurisdiction, status, tuple(int(x) for x in years), inflRate)
+    if table is None:
+        return
+    bp, pc, cumTax, std, offset, keys = table
+    income      = np.asarray(income, dtype = float)
+    taxedIncome = np.maximum(income - np.maximum(std, addDeductions), 0)
+    idx         = np.searchsorted(keys, np.minimum(taxedIncome, bp[:, -1]) + offset, side = 'right') - 1
+    tax         = cumTax.ravel()[idx] + (taxedIncome - bp.ravel()[idx])*pc.ravel()[idx]/100
+    tax, income = np.broadcast_arrays(tax, income)
+    effTaxRate  = np.divide(tax, income, out = np.zeros(np.shape(tax)), where = income != 0)
+    return tax, pc.ravel()[idx], effTaxRate
+
+# %% Tax Classes ##############################################################
 class incomeTax:
     def __init__(self, income, stdDeductions = 27700, addDeductions = 0,\
                   brackets_bp = np.array([22000, 89450, 190750, 364200, 462500, 693750]),\
-                  brackets_pc    = np.array([10, 12, 22, 24, 32, 35, 37]) ):
+                  brackets_pc    = np.array([10, 12, 22, 24, 32, 35, 37]), table = None ):
         self.income         = income
         self.brackets_bp    = brackets_bp
         self.brackets_pc    = brackets_pc 
-        self.taxedIncome    = max(self.income - max(stdDeductions, addDeductions),0)
-        
-        if not self.taxedIncome < brackets_bp[0]:           
-            if self.taxedIncome > brackets_bp[-1]:
-                idx_last = len(brackets_bp)-1
-            else:            
-                bool_list = self.taxedIncome/self.brackets_bp < 1
-                true_indices = [index for index, value in enumerate(bool_list) if value]
-                idx_last     = true_indices[0]-1
-            self.tax = self.brackets_bp[0]*self.brackets_pc[0]/100
-            for ii in range(1,idx_last+1):
-                self.tax = self.tax + (self.brackets_bp[ii]-self.brackets_bp[ii-1])*self.brackets_pc[ii]/100
-            self.tax = self.tax + (self.taxedIncome-self.brackets_bp[idx_last])\
-                      *self.brackets_pc[idx_last+1]/100
-            self.bracketPC = self.brackets_pc[idx_last+1]
-        else:
-            self.tax = self.taxedIncome*self.brackets_pc[0]/100
-            self.bracketPC = self.brackets_pc[0]
-      
-        self.effTaxRate = self.tax/self.income
+        tax, bracketPC, effTaxRate, taxedIncome = getIncomeTax(income, \
+                      stdDeductions = stdDeductions, addDeductions = addDeductions, table = table, \
+                      brackets_bp = brackets_bp, brackets_pc = brackets_pc)
+        self.taxedIncome    = taxedIncome[()]
+        self.tax            = tax[()]
+        self.bracketPC      = bracketPC[()]
+        self.effTaxRate     = effTaxRate[()]
         
 class ssTax_FY2023:
     def __init__(self, income):
         self.rate     = 6.2/100
         self.maxTax   = 147E3*self.rate
-        self.tax      = min(self.rate*income, self.maxTax)
+        self.tax      = np.minimum(self.rate*np.asarray(income), self.maxTax)[()]
         
 class mcTax_FY2023:
     def __init__(self, income):
         self.rate     = 1.45/100
-        self.tax      = self.rate*income
+        self.tax      = (self.rate*np.asarray(income))[()]
     
         
 class incomeTax_federal_FY2023:
     def __init__(self, income, status = 'single', addDeductions = 0 ):
         self.income    = income
         self.status    = status
-        if status == 'single':
-            brackets_bp = np.array([11000, 44725, 95375, 182100, 231250, 578125])
-            brackets_pc = np.array([10, 12, 22, 24, 32, 35, 37])
-            stdDeductions = 13850
-        elif status == 'married':
-            brackets_bp = np.array([22000, 89450, 190750, 364200, 462500, 693750])
-            brackets_pc    = np.array([10, 12, 22, 24, 32, 35, 37])
-            stdDeductions = 27700
-        else:
-            logging.error('kk')
+        schedule       = getTaxSchedule('federal', status, TAX_BASEYEAR)
+        if schedule is None:
+            logging.error('incomeTax:incomeTax_federal_FY2023:: status needs to be single or married.')
+            return
             
-        self.incomeTax = incomeTax(self.income, stdDeductions = stdDeductions, addDeductions = addDeductions,\
-                      brackets_bp = brackets_bp, brackets_pc = brackets_pc )
+        self.incomeTax = incomeTax(self.income, stdDeductions = schedule.stdDeductions, addDeductions = addDeductions,\
+                      brackets_bp = schedule.brackets_bp, brackets_pc = schedule.brackets_pc, table = schedule.table )
             
 class incomeTax_CA_FY2023:
     def __init__(self, income, status = 'single', addDeductions = 0 ):
         self.income    = income
         self.status    = status
-        if status == 'single':
-            brackets_bp = np.array([10412, 24684, 38959, 54081, 68350, 349137, 418961, 698271, 698272])
-            brackets_pc = np.array([1, 2, 4, 6, 8, 9.3, 10.3, 11.3, 12.3])
-            stdDeductions = 5363
-        elif status == 'married':
-            brackets_bp = np.array([20839, 49371, 63644, 78765, 93037, 474824, 569790, 949649])
-            brackets_pc = np.array([1, 2, 4, 6, 8, 9.3, 10.3, 11.3, 12.3])
-            stdDeductions = 10726
-        else:
-            logging.error('kk')
+        schedule       = getTaxSchedule('CA', status, TAX_BASEYEAR)
+        if schedule is None:
+            logging.error('incomeTax:incomeTax_CA_FY2023:: status needs to be single or married.')
+            return
             
-        self.incomeTax = incomeTax(self.income, stdDeductions = stdDeductions, addDeductions = addDeductions,\
-                      brackets_bp = brackets_bp, brackets_pc = brackets_pc )
-
+        self.incomeTax = incomeTax(self.income, stdDeductions = schedule.stdDeductions, addDeductions = addDeductions,\
+                      brackets_bp = schedule.brackets_bp, brackets_pc = schedule.brackets_pc, table = schedule.table )
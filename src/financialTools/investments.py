@@ -6,32 +6,70 @@ Created:    Swarnav Banik on Apr 20, 2024
 """
 import logging
 import numpy as np
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-from collections.abc import Sized
-from matplotlib.gridspec import GridSpec
 from src.financialTools.incomeTax import incomeTax
 from src.financialTools.incomeTax import incomeTax_federal_FY2023
 from src.financialTools.incomeTax import incomeTax_CA_FY2023
 from src.financialTools.incomeTax import ssTax_FY2023
 from src.financialTools.incomeTax import mcTax_FY2023
+from src.financialTools.incomeTax import getIncomeTaxHorizon
+from src.financialTools.incomeTax import getTaxSchedule, TAX_BASEYEAR
+from src.financialTools.export import seriesExport
 
-from src.frmtFig import frmtFig 
-clrPts, mpl, plt = frmtFig(mpl, plt, FS_title = 18, FS_tickLabel = 18, FS_axisLabel = 18)
 
 CODENAME = 'investments'
+
+INVESTMENT_SERIES = ['cost_PIP', 'cost_CIP', 'value_CIP', 'profit_CIP', 'profit_PIP']
+ACCOUNT_SERIES    = ['costs_PIP', 'costs_CIP', 'values_CIP', 'profits_CIP', 'profits_PIP']
 # %% Common Functions #########################################################
-def annual2month(annualVal):
-    monthVal = np.zeros((len(annualVal)*12+1,))
-    for ii in range(len(annualVal)):
-        monthVal[ii*12+1:(ii+1)*12+1] = annualVal[ii]/12
-    return monthVal
+def annual2month(annualVal, out = None):
+    """ Annual values (..., years) spread evenly over the months after month
+    0, as (..., years*12+1). The months are written through a (years x 12)
+    view of out, which is allocated unless given.
+    """
+    annualVal = np.asarray(annualVal, dtype = float)
+    nYears    = np.shape(annualVal)[-1]
+    if out is None:
+        out   = np.empty(np.shape(annualVal)[:-1] + (nYears*12+1,))
+    out[..., 0] = 0
+    np.divide(annualVal[..., None], 12, out = out[..., 1:].reshape(np.shape(out)[:-1] + (nYears, 12)))
+    return out
+
+def month2annual(monthVal, out = None):
+    """ Sums (..., years) of the monthly values (..., months) over the 12
+    months of every year, skipping month 0. Sums into out if given.
+    """
+    monthVal = np.asarray(monthVal, dtype = float)
+    nYears   = int(np.shape(monthVal)[-1]/12)
+    return monthVal[..., 1:nYears*12+1].reshape(np.shape(monthVal)[:-1] + (nYears, 12)).sum(axis = -1, out = out)
+
+def asSeries(x, length, name):
+    """ x as an array with a series of the given length on its last axis.
+    Scalars and a last axis of length 1 repeat, leading axes are a batch.
+    Returns None for any other length of the last axis.
+    """
+    x = np.asarray(x, dtype = float)
+    if np.ndim(x) == 0 or np.shape(x)[-1] == 1:
+        return np.broadcast_to(x[..., None] if np.ndim(x) == 0 else x, np.shape(x)[:-1] + (length,))
+    if np.shape(x)[-1] != length:
+        logging.error(f'investments:asSeries:: last axis of {name} needs length {length} or 1, ' \
+                      f'a batch of scalars needs shape (batch, 1).')
+        return
+    return x
 
-def month2annual(monthVal):
-    annualVal = np.zeros((int(len(monthVal)/12),))
-    for ii in range(len(annualVal)):
-        annualVal[ii] = np.sum(monthVal[ii*12+1:(ii+1)*12+1])
-    return annualVal
+def compoundGrowth(prnc, invstAppRate = 6.9/100/12):
+    """ Value of contributions prnc (..., term+1) compounding at invstAppRate
+    per period, i.e. value[ii] = value[ii-1]*(1 + rate[ii]) + prnc[ii]. The rate
+    is a scalar or an array over periods broadcastable against prnc, with 
+    rate[..., 0] unused. Evaluated from cumulative growth factors in one pass.
+    """
+    prnc    = np.asarray(prnc, dtype = float)
+    rate    = np.asarray(invstAppRate, dtype = float)
+    if np.ndim(rate) == 0 or np.shape(rate)[-1] == 1:
+        factor = (1 + rate)**np.arange(np.shape(prnc)[-1])
+    else:
+        growth = np.concatenate((np.ones(np.shape(rate)[:-1] + (1,)), 1 + rate[..., 1:]), axis = -1)
+        factor = np.cumprod(growth, axis = -1)
+    return factor * np.cumsum(prnc/factor, axis = -1)
 
 # %% Single Investment ########################################################
 class investment:
@@ -40,19 +78,45 @@ class investment:
         self.liquid        = liquid
         self.volatile      = volatile
         self.name          = name
-        self.term          = len(prnc) - 1
+        prnc               = np.asarray(prnc, dtype = float)
+        self.term          = np.shape(prnc)[-1] - 1
         self.invstAppRate  = invstAppRate
         self.cost_PIP      = prnc
-        self.cost_CIP      = prnc.cumsum()
-        self.value_CIP     = np.zeros(np.shape(self.cost_PIP))
-        self.value_CIP[0]  = self.cost_PIP[0]
-        for ii in range(1, self.term + 1):
-            self.value_CIP[ii] = self.value_CIP[ii-1] *(1 + self.invstAppRate) + self.cost_PIP[ii]
+        self.cost_CIP      = prnc.cumsum(axis = -1)
+        self.value_CIP     = compoundGrowth(self.cost_PIP, self.invstAppRate)
         self.profit_CIP    = self.value_CIP - self.cost_CIP
-        self.profit_PIP    = np.insert( np.diff(self.profit_CIP), 0, 0)
+        self.profit_PIP    = np.insert( np.diff(self.profit_CIP, axis = -1), 0, 0, axis = -1)
+
+    def getSeries(self):
+        return {name: getattr(self, name) for name in INVESTMENT_SERIES}
 
 # %% Portfolio of Investments #################################################
-class invstPortfolio:
+class accountView:
+    """ One account of an invstPortfolio. Its series are views into the
+    arrays of the portfolio, nothing is copied.
+    """
+    __slots__ = ('portfolio', 'index')
+
+    def __init__(self, portfolio, index):
+        self.portfolio = portfolio
+        self.index     = index
+
+    name         = property(lambda self: self.portfolio.names[self.index])
+    liquid       = property(lambda self: bool(self.portfolio.liquid[self.index]))
+    volatile     = property(lambda self: bool(self.portfolio.volatile[self.index]))
+    invstAppRate = property(lambda self: self.portfolio.inRts[self.index]/12)
+    term         = property(lambda self: self.portfolio.term)
+    cost_PIP     = property(lambda self: self.portfolio.costs_PIP[..., self.index, :])
+    cost_CIP     = property(lambda self: self.portfolio.costs_CIP[..., self.index, :])
+    value_CIP    = property(lambda self: self.portfolio.values_CIP[..., self.index, :])
+    profit_CIP   = property(lambda self: self.portfolio.profits_CIP[..., self.index, :])
+    profit_PIP   = property(lambda self: self.portfolio.profits_PIP[..., self.index, :])
+
+class invstPortfolio(seriesExport):
+    """ Portfolio of accounts held as (..., accounts, months) arrays, with
+    boolean liquid and volatile masks over the accounts. accounts holds
+    zero-copy views of the single accounts.
+    """
     def __init__(self, prncs = np.zeros((6,)), inRts = np.array([0, 3.8, 4.5, 6.9, 5, 6.9])/100, \
                  accountNames = ['Checkings', 'Savings', 'CDs', 'Stocks', 'Treasury', '401K'],\
                  liquid   = [True, True, False, True, False, False],\
@@ -69,76 +133,97 @@ class invstPortfolio:
             logging.error('investments:invstPortfolio:: prncs needs to be of the same row size as number of accounts.')
             return
        
-        self.accounts       = []
-        for ii in range(len(accountNames)):
-            self.accounts.append(self.setInvstAccount(prncs[ii], inRts[ii], \
-                                 liquid[ii], volatile[ii], accountNames[ii]))
+        prncs = [self.getAccountPrnc(prncs[ii]) for ii in range(self.noOfAccounts)]
+        if any(x is None for x in prncs):
+            return
+        self.names       = list(accountNames)
+        self.inRts       = np.asarray(inRts, dtype = float)
+        self.liquid      = np.asarray(liquid, dtype = bool)
+        self.volatile    = np.asarray(volatile, dtype = bool)
+        self.costs_PIP   = np.stack(np.broadcast_arrays(*prncs), axis = -2)
+        self.costs_CIP   = self.costs_PIP.cumsum(axis = -1)
+        self.values_CIP  = compoundGrowth(self.costs_PIP, self.inRts[:, None]/12)
+        self.profits_CIP = self.values_CIP - self.costs_CIP
+        self.profits_PIP = np.insert( np.diff(self.profits_CIP, axis = -1), 0, 0, axis = -1)
+        self.accounts    = [accountView(self, ii) for ii in range(self.noOfAccounts)]
+        self.condAssets  = {}
 
-        costs_PIP   = np.array([x.cost_PIP for x in self.accounts])
-        costs_CIP   = np.array([x.cost_CIP for x in self.accounts])
-        values_CIP  = np.array([x.value_CIP for x in self.accounts])
-        profits_CIP = np.array([x.profit_CIP for x in self.accounts])
-        self.cost_PIP    = np.sum(costs_PIP, axis = 0)
-        self.cost_CIP    = np.sum(costs_CIP, axis = 0)
-        self.value_CIP   = np.sum(values_CIP, axis = 0)
-        self.profit_CIP  = np.sum(profits_CIP, axis = 0)
+        self.cost_PIP    = self.costs_PIP.sum(axis = -2)
+        self.cost_CIP    = self.costs_CIP.sum(axis = -2)
+        self.value_CIP   = self.values_CIP.sum(axis = -2)
+        self.profit_CIP  = self.profits_CIP.sum(axis = -2)
      
         
-    def setInvstAccount(self, prncVal, inRt, liquid, volatile, name):  
-        if not isinstance(prncVal, Sized):
-            prnc    = np.zeros((self.term+1,))
-            prnc[0] = prncVal            
-        elif len(prncVal) == 1:
-            prnc    = np.zeros((self.term+1,0))
-            prnc[0] = prncVal
-        elif not len(np.array(prncVal)) == self.term+1:
-            logging.error('investments:invstPortfolio::setInvstAccount::: length of prncVal is wrong.')
+    def getSeries(self):
+        """ Series of every account, as views named series[account], and
+        the totals over the accounts.
+        """
+        series = {}
+        for name in ACCOUNT_SERIES:
+            value = getattr(self, name)
+            for ii, account in enumerate(self.names):
+                series[f'{name}[{account}]'] = value[..., ii, :]
+        for name in INVESTMENT_SERIES[:-1]:
+            series[name] = getattr(self, name)
+        return series
+
+    def getAccountPrnc(self, prncVal):  
+        # A starting balance, or contributions over the months (last axis) ###
+        prncVal = np.asarray(prncVal, dtype = float)
+        if np.ndim(prncVal) == 0 or np.shape(prncVal)[-1] == 1:
+            prnc    = np.zeros(np.shape(prncVal)[:-1] + (self.term+1,))
+            prnc[..., 0] = prncVal if np.ndim(prncVal) == 0 else prncVal[..., 0]
+        elif not np.shape(prncVal)[-1] == self.term+1:
+            logging.error('investments:invstPortfolio::getAccountPrnc::: length of prncVal is wrong.')
+            return
         else:
             prnc = prncVal
-
-        invstAcct = investment(prnc, invstAppRate = inRt/12, liquid = liquid, \
-                               volatile = volatile, name = name)
-        return invstAcct
-    
+        return prnc
     
-    def getCondAssets(self, cond = 'volatile'):
+    def getCondMask(self, cond):
         if cond == 'volatile':
-            cond  = [x.volatile for x in self.accounts]
+            return self.volatile
         elif cond == 'liquid':
-            cond  = [x.liquid for x in self.accounts]
+            return self.liquid
         elif cond == 'liquid and non-volatile':
-            cond  = np.logical_and([x.liquid for x in self.accounts],\
-                                   [not x.volatile for x in self.accounts])
-        else:
-            logging.error('investments:invstPortfolio::getCondAssets::: accounts needs to be all or total.')
-            return
-        true_indices = [index for index, value in enumerate(cond) if value]
-        false_indices = [index for index, value in enumerate(cond) if not value]
-        tot_cost_true = 0
-        tot_cost_false = 0
-        tot_value_true = 0
-        tot_value_false = 0
-        for ii in true_indices:
-            tot_cost_true = tot_cost_true + self.accounts[ii].cost_CIP 
-            tot_value_true = tot_value_true + self.accounts[ii].value_CIP 
-        for ii in false_indices:
-            tot_cost_false = tot_cost_false + self.accounts[ii].cost_CIP
-            tot_value_false = tot_value_false + self.accounts[ii].value_CIP
-        return tot_cost_true, tot_cost_false, tot_value_true, tot_value_false
+            return self.liquid & ~self.volatile
+        logging.error('investments:invstPortfolio::getCondAssets::: accounts needs to be all or total.')
+        return
+    
+    def getCondAssets(self, cond = 'volatile'):
+        """ Cumulative cost and value of the accounts meeting cond and of the
+        rest, computed once per cond.
+        """
+        if cond not in self.condAssets:
+            mask = self.getCondMask(cond)
+            if mask is None:
+                return
+            self.condAssets[cond] = (self.costs_CIP[..., mask, :].sum(axis = -2), \
+                                     self.costs_CIP[..., ~mask, :].sum(axis = -2), \
+                                     self.values_CIP[..., mask, :].sum(axis = -2), \
+                                     self.values_CIP[..., ~mask, :].sum(axis = -2))
+        return self.condAssets[cond]
+
+    def monteCarlo(self, nPaths = 10000, vols = None, corr = None, \
+                   percentiles = [5, 25, 50, 75, 95], chunkSize = 1000, seed = None):
+        """ Percentile bands of the portfolio value under random returns, see
+        src.financialTools.monteCarlo.simulatePortfolio.
+        """
+        from src.financialTools.monteCarlo import simulatePortfolio
+        return simulatePortfolio(self, nPaths = nPaths, vols = vols, corr = corr, \
+                                 percentiles = percentiles, chunkSize = chunkSize, seed = seed)
 
 
     def plotGrowth_percent(self, axs, accounts = 'total'):    
+        from src.financialTools.plotting import clrPts
         if accounts == 'all':
             for ii in range(self.noOfAccounts):
                 axs.plot(self.months/12, self.accounts[ii].value_CIP*100/self.value_CIP, '-', \
                           linewidth = 4, label = self.accounts[ii].name)
         elif accounts == 'all-wrt-total':
+            baselines = np.cumsum(self.values_CIP, axis = -2) - self.values_CIP
             for ii in range(0,self.noOfAccounts):
-                y = [x.value_CIP for x in self.accounts]
-                if ii == 0:
-                    baseline = np.zeros(np.shape(self.accounts[ii].value_CIP))
-                else:
-                    baseline = np.sum(y[:ii], axis = 0)*1E-6
+                baseline = baselines[..., ii, :]*1E-6
                 axs.fill_between(self.months/12, self.accounts[ii].value_CIP*1E-6+baseline, baseline,ls =  '-', \
                           linewidth = 4, label = self.accounts[ii].name)
         elif accounts == 'volatile':
@@ -173,6 +258,7 @@ class invstPortfolio:
         return axs
     
     def plotGrowth_value(self, axs, accounts = 'total'):    
+        from src.financialTools.plotting import clrPts
         if accounts == 'all':
             for ii in range(self.noOfAccounts):
                 axs.plot(self.months/12, self.accounts[ii].value_CIP*1E-6, '-', \
@@ -183,12 +269,9 @@ class invstPortfolio:
             axs.plot(self.months/12, self.value_CIP*1E-6, '-', \
                       linewidth = 4, label = 'Value')
         elif accounts == 'all-wrt-total':
+            baselines = np.cumsum(self.values_CIP, axis = -2) - self.values_CIP
             for ii in range(0,self.noOfAccounts):
-                y = [x.value_CIP for x in self.accounts]
-                if ii == 0:
-                    baseline = np.zeros(np.shape(self.accounts[ii].value_CIP))
-                else:
-                    baseline = np.sum(y[:ii], axis = 0)*1E-6
+                baseline = baselines[..., ii, :]*1E-6
                 axs.fill_between(self.months/12, self.accounts[ii].value_CIP*1E-6+baseline, baseline,ls =  '-', \
                           linewidth = 4, label = self.accounts[ii].name)
         elif accounts == 'volatile':
@@ -235,7 +318,7 @@ class invstPortfolio:
         
 
 # %% Income Allocation ########################################################
-class incomeDist:
+class incomeDist(seriesExport):
     def __init__(self, annualIncome, annualExpense = 40E3, \
                  contb401k_self = 17E3, contb401k_empl = 6E3, contb401k_start = 0,\
                  contbTreasury = 10E3, contbTreasury_start = 0, \
@@ -243,50 +326,39 @@ class incomeDist:
                  cd_splitRatio = 0.25, cd_start = 0,\
                  sav_start = 0, check_start = 0,\
                  inRt = np.array([0, 4.5, 5, 6.9, 5, 6.9])/100, \
-                 term_years = 30 ):   
+                 term_years = 30, taxYear = None ):   
+        """ Monthly split of income into the six accounts of a portfolio.
+        Yearly inputs (income, expense and contributions) are scalars or 
+        have the term_years years on their last axis, the split ratios the
+        term_years*12 + 1 months. Leading axes are a batch of households, so
+        one value per household is a (batch, 1) array: a 1-D array is always
+        read as a series. The starting balances are scalars or of the batch
+        shape. Any other length is logged as an error.
+        """
         # Initialize ##########################################################
-        if not isinstance(annualIncome, Sized):
-            self.annualIncome  = annualIncome * np.ones((term_years,))        
-        elif not len(np.array(annualIncome)) == term_years:
-            logging.error('investments:incomeDist:: length of annualIncome is wrong.')
-        else:
-            self.annualExpense  = annualExpense
-        if not isinstance(annualExpense, Sized):
-            self.annualExpense  = annualExpense * np.ones((term_years,))        
-        elif not len(np.array(annualExpense)) == term_years:
-            logging.error('investments:incomeDist:: length of annualIncome is wrong.')
-        else:
-            self.annualExpense  = annualExpense 
-        if not isinstance(contb401k_self, Sized):
-            contb401k_self  = contb401k_self * np.ones((term_years,))        
-        elif not len(np.array(contb401k_self)) == term_years:
-            logging.error('investments:incomeDist:: length of annualIncome is wrong.')
-        if not isinstance(contb401k_empl, Sized):
-            contb401k_empl  = contb401k_empl * np.ones((term_years,))        
-        elif not len(np.array(contb401k_empl)) == term_years:
-            logging.error('investments:incomeDist:: length of annualIncome is wrong.')
-        if not isinstance(contbTreasury, Sized):
-            contbTreasury  = contbTreasury * np.ones((term_years,))        
-        elif not len(np.array(contbTreasury)) == term_years:
-            logging.error('investments:incomeDist:: length of contbTreasury is wrong.')
+        self.annualIncome  = asSeries(annualIncome, term_years, 'annualIncome')
+        self.annualExpense = asSeries(annualExpense, term_years, 'annualExpense')
+        contb401k_self     = asSeries(contb401k_self, term_years, 'contb401k_self')
+        contb401k_empl     = asSeries(contb401k_empl, term_years, 'contb401k_empl')
+        contbTreasury      = asSeries(contbTreasury, term_years, 'contbTreasury')
             
         self.term         = term_years*12
         self.months       = np.array(range(self.term+1))
-        self.prnc         = np.zeros((6,self.term+1))
+        stocks_splitRatio = asSeries(stocks_splitRatio, self.term+1, 'stocks_splitRatio')
+        cd_splitRatio     = asSeries(cd_splitRatio, self.term+1, 'cd_splitRatio')
+        if any(x is None for x in [self.annualIncome, self.annualExpense, contb401k_self, contb401k_empl, \
+                                   contbTreasury, stocks_splitRatio, cd_splitRatio]):
+            return
+        starts            = [check_start, sav_start, cd_start, stocks_start, contbTreasury_start, contb401k_start]
+        self.batch        = np.broadcast_shapes(*[np.shape(x)[:-1] for x in [self.annualIncome, self.annualExpense, \
+                                                  contb401k_self, contb401k_empl, contbTreasury, \
+                                                  stocks_splitRatio, cd_splitRatio]], \
+                                                *[np.shape(x) for x in starts])
+        self.prnc         = np.zeros(self.batch + (6,self.term+1))
         self.remainder    = annual2month(self.annualIncome)
         
-        if not isinstance(stocks_splitRatio, Sized):
-            stocks_splitRatio  = stocks_splitRatio * np.ones((self.term+1,))        
-        elif not len(np.array(stocks_splitRatio)) == self.term+1:
-            logging.error('investments:incomeDist:: length of stocks_splitRatio is wrong.')
-        if not isinstance(cd_splitRatio, Sized):
-            cd_splitRatio  = cd_splitRatio * np.ones((self.term+1,))        
-        elif not len(np.array(cd_splitRatio)) == self.term+1:
-            logging.error('investments:incomeDist:: length of cd_splitRatio is wrong.')
-        
-        
         self.det401contribution(contb401k_start, contb401k_self, contb401k_empl)
-        self.deductTaxes()
+        self.deductTaxes(taxYear)
         self.deductExpenses()
         self.detTreasurycontribution(contbTreasury, contbTreasury_start)
         self.splitIncome(stocks_splitRatio, cd_splitRatio, stocks_start, cd_start, sav_start, check_start)
@@ -294,62 +366,74 @@ class incomeDist:
  
        
     def det401contribution(self, contb401k_start, contb401k_self, contb401k_empl, limit_401k = 23E3):
-        contb401k      = contb401k_empl + [min(x, limit_401k) for x in contb401k_self]
-        self.prnc[5,:] = annual2month(contb401k)
-        self.prnc[5,0] = contb401k_start
+        contb401k      = contb401k_empl + np.minimum(contb401k_self, limit_401k)
+        self.prnc[...,5,:] = annual2month(contb401k)
+        self.prnc[...,5,0] = contb401k_start
         self.remainder = self.remainder - annual2month(contb401k_self)
         self.annualDeductions = contb401k - contb401k_empl
         self.income_401k = contb401k_empl
         
-    def deductTaxes(self):
-        self.annualTax = np.zeros(np.shape(self.annualIncome))
-        for ii in range(len(self.annualIncome)):
-            annualTax_fed = incomeTax_federal_FY2023(self.annualIncome[ii], status = 'single',\
-                                    addDeductions = self.annualDeductions[ii]) 
-            annualTax_ca = incomeTax_CA_FY2023(self.annualIncome[ii], status = 'single',\
-                                    addDeductions = self.annualDeductions[ii])
-            annualTax_ss = ssTax_FY2023(self.annualIncome[ii])
-            annualTax_mc = mcTax_FY2023(self.annualIncome[ii])
-            self.annualTax[ii] = annualTax_fed.incomeTax.tax + annualTax_ca.incomeTax.tax \
-                                + annualTax_ss.tax + annualTax_mc.tax
+    def deductTaxes(self, taxYear = None):
+        annualTax_ss  = ssTax_FY2023(self.annualIncome)
+        annualTax_mc  = mcTax_FY2023(self.annualIncome)
+        if taxYear is None:
+            annualTax_fed = incomeTax_federal_FY2023(self.annualIncome, status = 'single',\
+                                    addDeductions = self.annualDeductions).incomeTax.tax 
+            annualTax_ca  = incomeTax_CA_FY2023(self.annualIncome, status = 'single',\
+                                    addDeductions = self.annualDeductions).incomeTax.tax
+        else:
+            years         = taxYear + np.arange(np.shape(self.annualIncome)[-1])
+            annualTax_fed = getIncomeTaxHorizon(self.annualIncome, years, 'federal', 'single',\
+                                    addDeductions = self.annualDeductions)[0]
+            annualTax_ca  = getIncomeTaxHorizon(self.annualIncome, years, 'CA', 'single',\
+                                    addDeductions = self.annualDeductions)[0]
+        self.annualTax = annualTax_fed + annualTax_ca \
+                       + annualTax_ss.tax + annualTax_mc.tax
         self.remainder = self.remainder - annual2month(self.annualTax)  
 
     def deductExpenses(self):
         self.remainder = self.remainder - annual2month(self.annualExpense)  
 
     def detTreasurycontribution(self, contbTreasury, contbTreasury_start, limit_treasury = 10E3):
-        self.prnc[4,:] = [min(x, limit_treasury/12) for x in annual2month(contbTreasury)]
-        self.remainder[1:] = self.remainder[1:] - self.prnc[4,1:]
-        self.prnc[4,0] = contbTreasury_start
+        self.prnc[...,4,:] = np.minimum(annual2month(contbTreasury), limit_treasury/12)
+        self.remainder = self.remainder - self.prnc[...,4,:]*(self.months >= 1)
+        self.prnc[...,4,0] = contbTreasury_start
                 
     def splitIncome(self, stocks_splitRatio, cd_splitRatio, stocks_start, cd_start, sav_start, check_start):
         
-        if any(stocks_splitRatio + cd_splitRatio > 1):
+        if np.any(stocks_splitRatio + cd_splitRatio > 1):
             logging.error('investments:incomeDist::splitIncome::: split ratios are wrong. lala')
             return
        
-        self.prnc[3,:]   = stocks_splitRatio * self.remainder
-        self.prnc[2,:]   = cd_splitRatio * self.remainder
-        self.remainder[1:]   = self.remainder[1:] - self.prnc[3,1:] - self.prnc[2,1:]
-        self.prnc[3,0]   = stocks_start
-        self.prnc[2,0]   = cd_start
-        self.prnc[1,:]   = self.remainder
-        self.prnc[1,0]   = sav_start
+        self.prnc[...,3,:]   = stocks_splitRatio * self.remainder
+        self.prnc[...,2,:]   = cd_splitRatio * self.remainder
+        self.remainder   = self.remainder - (self.prnc[...,3,:] + self.prnc[...,2,:])*(self.months >= 1)
+        self.prnc[...,3,0]   = stocks_start
+        self.prnc[...,2,0]   = cd_start
+        self.prnc[...,1,:]   = self.remainder
+        self.prnc[...,1,0]   = sav_start
         self.remainder   = self.remainder - self.remainder
-        self.prnc[0,0]   = check_start
+        self.prnc[...,0,0]   = check_start
         
     def invest(self, inRt):
         accountNames = ['Checkings', 'Savings', 'CDs', 'Stocks', 'Treasury', '401K']
         liquid       = [True, True, False, True, False, False]
         volatile     = [False, False, False, True, False, True]
-        self.portfolio = invstPortfolio(prncs = self.prnc, inRts = inRt, accountNames = accountNames,\
+        self.portfolio = invstPortfolio(prncs = np.moveaxis(self.prnc, -2, 0), inRts = inRt, accountNames = accountNames,\
                                             liquid   = liquid, volatile = volatile,\
                                             term_years = int(self.term/12))
-        self.annualContributions = np.zeros((6,int(self.term/12)))
-        for ii in range(6):
-            self.annualContributions[ii] = month2annual(self.portfolio.accounts[ii].cost_PIP)
+        self.annualContributions = month2annual(self.prnc)
+
+    def getSeries(self):
+        """ Contributions to every account as prnc[account], and the series
+        of the portfolio as portfolio.series.
+        """
+        series = {f'prnc[{account}]': self.prnc[..., ii, :] for ii, account in enumerate(self.portfolio.names)}
+        series.update({f'portfolio.{x}': y for x, y in self.portfolio.getSeries().items()})
+        return series
 
     def printAnnualIncomeDist(self,figNo):
+        from src.financialTools.plotting import plt, GridSpec
         fig = plt.figure(figNo,figsize=(12,3*5))
         gs  = GridSpec(3,1)
         axs1 = fig.add_subplot(gs[0,0])
@@ -359,6 +443,7 @@ class incomeDist:
         return fig
         
     def printIncomeAndSaving(self, axs, year = 1):
+        from src.financialTools.plotting import plt
         axs.barh(0,(self.annualIncome[year-1]+self.income_401k[year-1])*1E-3,  height = 0.8, label = 'Income')
         axs.barh(1,self.annualTax[year-1]*1E-3,  height = 0.8, label = 'Tax')
         axs.barh(1,self.annualExpense[year-1]*1E-3,  height = 0.8, left = self.annualTax[year-1]*1E-3, label = 'Expenses')
@@ -370,13 +455,93 @@ class incomeDist:
         axs.grid('major')
         
     def printSavingDist(self, axs, year = 1):
+        from src.financialTools.plotting import plt
         for ii in range(len(self.portfolio.accounts)):
             axs.bar(ii,self.annualContributions[ii,year-1]*1E-3, width = 0.8, \
                       label = self.portfolio.accounts[ii].name + f' = {self.annualContributions[ii,year-1]*1E-3:.2}')
         plt.xticks(range(len(self.portfolio.accounts)), [x.name for x in self.portfolio.accounts]) 
         axs.grid('major')
         axs.set_ylabel('Amount (k $)')
-        
-        
 
-    
+
+# %% Streaming Income Distribution ############################################
+class incomeDistState:
+    """ State of stepIncomeDist after a month: the contributions made (prnc)
+    and balances (value) of the six incomeDist accounts along the last axis,
+    the tax paid and the cash left after taxes, expenses, 401K and Treasury
+    that month. The stepper updates it in place, copy() it to keep it.
+    """
+    __slots__ = ('month', 'prnc', 'value', 'tax', 'cash')
+
+    def __init__(self, month, prnc, value, tax, cash):
+        self.month = month
+        self.prnc  = prnc
+        self.value = value
+        self.tax   = tax
+        self.cash  = cash
+
+    def copy(self):
+        return incomeDistState(self.month, self.prnc.copy(), self.value.copy(), \
+                               self.tax.copy(), self.cash.copy())
+
+def atStep(x, step):
+    """ Entry of x for a year or month: x is a scalar or has them on its last
+    axis, with length 1 for values that do not change.
+    """
+    x = np.asarray(x, dtype = float)
+    if np.ndim(x) == 0 or np.shape(x)[-1] == 1:
+        return x[..., 0] if np.ndim(x) > 0 else x
+    return x[..., step]
+
+def stepIncomeDist(annualIncome, annualExpense = 40E3, \
+                   contb401k_self = 17E3, contb401k_empl = 6E3, contb401k_start = 0,\
+                   contbTreasury = 10E3, contbTreasury_start = 0, \
+                   stocks_splitRatio = 0.25, stocks_start = 0,\
+                   cd_splitRatio = 0.25, cd_start = 0,\
+                   sav_start = 0, check_start = 0,\
+                   inRt = np.array([0, 4.5, 5, 6.9, 5, 6.9])/100, \
+                   term_years = 30, taxYear = None, limit_401k = 23E3, limit_treasury = 10E3):
+    """ Month by month incomeDist. Yields an incomeDistState for month 0 and
+    every month after, holding only the current month, so memory does not
+    grow with the horizon and the caller may stop at any point. With 
+    term_years = None it runs until the caller stops. Yearly inputs are 
+    scalars or have years on the last axis, split ratios months, with length
+    1 for inputs that do not change. Leading axes are scenarios and broadcast.
+    """
+    rate   = np.asarray(inRt, dtype = float)/12
+    start  = np.stack(np.broadcast_arrays(*[np.asarray(x, dtype = float) for x in \
+                      [check_start, sav_start, cd_start, stocks_start, contbTreasury_start, contb401k_start]]), axis = -1)
+    batch  = np.broadcast_shapes(np.shape(start)[:-1], *[np.shape(x)[:-1] for x in \
+                      [annualIncome, annualExpense, contb401k_self, contb401k_empl, contbTreasury, \
+                       stocks_splitRatio, cd_splitRatio] if np.ndim(x) > 0])
+    state  = incomeDistState(0, np.broadcast_to(start, batch + (6,)).copy(), \
+                             np.broadcast_to(start, batch + (6,)).copy(), np.zeros(batch), np.zeros(batch))
+    yield state
+
+    month = 0
+    while term_years is None or month < term_years*12:
+        year  = month//12
+        month = month + 1
+        if (month-1) % 12 == 0:
+            # Yearly flows ####################################################
+            income     = atStep(annualIncome, year)
+            self401k   = atStep(contb401k_self, year)
+            deductions = np.minimum(self401k, limit_401k)
+            taxYr      = TAX_BASEYEAR if taxYear is None else taxYear + year
+            annualTax  = getTaxSchedule('federal', 'single', taxYr).getTax(income, deductions)[0] \
+                       + getTaxSchedule('CA', 'single', taxYr).getTax(income, deductions)[0] \
+                       + ssTax_FY2023(income).tax + mcTax_FY2023(income).tax
+            prnc401k   = (atStep(contb401k_empl, year) + deductions)/12
+            treasury   = np.minimum(atStep(contbTreasury, year)/12, limit_treasury/12)
+            cash       = (income - self401k - annualTax - atStep(annualExpense, year))/12 - treasury
+        stocks = atStep(stocks_splitRatio, month)*cash
+        cd     = atStep(cd_splitRatio, month)*cash
+        state.month        = month
+        state.prnc[...]    = np.stack(np.broadcast_arrays(0*cash, cash - stocks - cd, cd, stocks, \
+                                                          treasury + 0*cash, prnc401k + 0*cash), axis = -1)
+        state.value       *= 1 + rate
+        state.value       += state.prnc
+        state.tax[...]     = annualTax/12
+        state.cash[...]    = cash
+        yield state
+
@@ -0,0 +1,174 @@
+"""
+###############################################################################
+Code for Monte Carlo estimates of investment growth.
+###############################################################################
+"""
+
+import logging
+import numpy as np
+from src.financialTools.investments import compoundGrowth
+from src.financialTools.houseOwnCost import breakEvenMonth
+CODENAME = 'monteCarlo'
+
+MC_VOLATILITY  = 15/100
+MC_CORRELATION = 0.9
+MC_PERCENTILES = [5, 25, 50, 75, 95]
+
+# Home price appreciation, rent growth and market returns ####################
+MC_VOLS_RENTVSBUY = [6/100, 3/100, 15/100]
+MC_CORR_RENTVSBUY = np.array([[1.0, 0.5, 0.2],\
+                              [0.5, 1.0, 0.1],\
+                              [0.2, 0.1, 1.0]])
+
+# %% Common Functions #########################################################
+def getCorrelation(volatile, corrVolatile = MC_CORRELATION):
+    """ Correlation between accounts: corrVolatile between volatile accounts
+    and none otherwise.
+    """
+    volatile = np.asarray(volatile, dtype = bool)
+    corr     = np.where(np.outer(volatile, volatile), corrVolatile, 0.0)
+    np.fill_diagonal(corr, 1)
+    return corr
+
+def drawReturns(rng, nPaths, rates, vols, corr, nMonths):
+    """ Monthly returns of shape (*batch, nPaths, len(vols), nMonths+1) for
+    rates of shape (*batch, len(vols)). Each asset compounds log-normally
+    with the annual rate and volatility given, so that the mean monthly
+    growth is 1 + rate/12, and the monthly shocks of the assets are
+    correlated by corr. Every batch point sees the same shocks. The returns
+    of month 0 are 0.
+    """
+    rates = np.asarray(rates, dtype = float)
+    sigma = np.asarray(vols, dtype = float)/np.sqrt(12)
+    mu    = np.log(1 + rates/12) - sigma**2/2
+    chol  = np.linalg.cholesky(corr)
+    shock = rng.standard_normal((nPaths, nMonths+1, len(sigma))) @ chol.T
+    returns = np.swapaxes(np.expm1(mu[..., None, None, :] + sigma*shock), -1, -2)
+    returns[..., 0] = 0
+    return returns
+
+# %% Monte Carlo Result #######################################################
+class mcResult:
+    """ Percentile bands (percentiles x *batch x months) of a Monte Carlo run.
+    """
+    def __init__(self, percentiles, months, **bands):
+        self.percentiles = np.asarray(percentiles)
+        self.months      = months
+        for name, band in bands.items():
+            setattr(self, name, band)
+        self.bands       = list(bands)
+
+    def getBand(self, name, percentile):
+        idx = np.flatnonzero(self.percentiles == percentile)
+        if len(idx) == 0:
+            logging.error(f'monteCarlo:mcResult::getBand::: {percentile} is not a computed percentile.')
+            return
+        return getattr(self, name)[idx[0]]
+
+# %% Portfolio ################################################################
+def simulatePortfolio(portfolio, nPaths = 10000, vols = None, corr = None, \
+                      percentiles = MC_PERCENTILES, chunkSize = 1000, seed = None):
+    """ Monte Carlo growth of an invstPortfolio. Account ii compounds at its
+    rate with annual volatility vols[ii], by default MC_VOLATILITY for the
+    volatile accounts and none for the rest. Paths are simulated chunkSize at
+    a time as one (paths x accounts x months) batch. A batched portfolio gets
+    its path axis after the batch axes, with the same paths for every batch
+    point. Returns an mcResult with bands (percentiles, *batch, months) of 
+    value_CIP, value_volatile, value_nonVolatile and frac_volatile.
+    """
+    volatile = portfolio.volatile
+    rates    = portfolio.inRts
+    costs    = portfolio.costs_PIP
+    if vols is None:
+        vols = np.where(volatile, MC_VOLATILITY, 0)
+    if corr is None:
+        corr = getCorrelation(volatile)
+    if len(vols) != portfolio.noOfAccounts or np.shape(corr) != (portfolio.noOfAccounts,)*2:
+        logging.error('monteCarlo:simulatePortfolio:: vols and corr need one entry per account.')
+        return
+
+    batch          = np.broadcast_shapes(np.shape(costs)[:-2], np.shape(rates)[:-1])
+    costs          = np.asarray(costs)[..., None, :, :]
+    rng            = np.random.default_rng(seed)
+    value_CIP      = np.empty(batch + (nPaths, portfolio.term+1))
+    value_volatile = np.empty(batch + (nPaths, portfolio.term+1))
+    for start in range(0, nPaths, chunkSize):
+        stop    = min(start + chunkSize, nPaths)
+        returns = drawReturns(rng, stop-start, rates, vols, corr, portfolio.term)
+        values  = compoundGrowth(costs, returns)
+        value_CIP[..., start:stop, :]      = values.sum(axis = -2)
+        value_volatile[..., start:stop, :] = values[..., volatile, :].sum(axis = -2)
+    value_nonVolatile = value_CIP - value_volatile
+    frac_volatile     = np.divide(value_volatile, value_CIP, out = np.zeros(np.shape(value_CIP)), \
+                                  where = value_CIP != 0)
+
+    return mcResult(percentiles, portfolio.months, \
+                    value_CIP         = np.percentile(value_CIP, percentiles, axis = -2),\
+                    value_volatile    = np.percentile(value_volatile, percentiles, axis = -2),\
+                    value_nonVolatile = np.percentile(value_nonVolatile, percentiles, axis = -2),\
+                    frac_volatile     = np.percentile(frac_volatile, percentiles, axis = -2))
+
+# %% Renting v/s Buying #######################################################
+def simulateRentVSbuy(model, nPaths = 1000, vols = MC_VOLS_RENTVSBUY, corr = MC_CORR_RENTVSBUY, \
+                      percentiles = MC_PERCENTILES, chunkSize = 1000, seed = None):
+    """ Monte Carlo of a rentVSbuy. Home prices, rents and market returns 
+    follow joint random paths with the model's rates as their means, annual
+    volatilities vols and correlation corr. Rents still change once a year.
+    The mortgage, taxes and tax credits stay as in the model. A batched 
+    model gives a batch axis ahead of the path axis, with the same random 
+    paths for every batch point. Batch points are simulated a group of about
+    chunkSize/nPaths at a time and paths chunkSize at a time, so memory is
+    of order max(chunkSize, nPaths) x months whatever the batch. Returns an
+    mcResult with bands (percentiles, *batch, months) of unrecoverCost_CM, 
+    the break-even month of every path (breakEven_M, see breakEvenMonth, 
+    nan if never) and the probability of having broken even by every month
+    (breakEven_CDF).
+    """
+    house   = model.house
+    term    = model.term*12
+    months  = np.arange(term+1)
+    # Monthly rent growth compounding to rentAppRate over a year #############
+    rentRate  = 12*((1 + np.asarray(model.rentAppRate, dtype = float))**(1/12) - 1)
+    rates     = np.stack(np.broadcast_arrays(model.realEstateAppRate, rentRate, model.invstAppRate), axis = -1)
+    batch     = np.broadcast_shapes(np.shape(rates)[:-1], np.shape(house.cost_PM)[:-1], \
+                                    np.shape(model.housePrice), np.shape(model.startRent))
+    # Batch points flattened onto one axis ###################################
+    nBatch     = int(np.prod(batch))
+    rates      = np.broadcast_to(rates, batch + (3,)).reshape(nBatch, 3)
+    housePrice = np.broadcast_to(np.asarray(model.housePrice, dtype = float), batch).reshape(nBatch, 1, 1)
+    startRent  = np.broadcast_to(np.asarray(model.startRent, dtype = float), batch).reshape(nBatch, 1, 1)
+    equity_frc, cost_CM, cost_PM = [np.broadcast_to(x, batch + (term+1,)).reshape(nBatch, 1, term+1) \
+                                    for x in [house.equity_CM_frc, house.cost_CM, house.cost_PM]]
+    
+    seed        = np.random.SeedSequence(seed)
+    nGroup      = max(1, chunkSize//nPaths)
+    bands       = np.empty((len(percentiles), nBatch, term+1))
+    breakEven_M = np.empty((nBatch, nPaths))
+    for first in range(0, nBatch, nGroup):
+        group            = slice(first, min(first + nGroup, nBatch))
+        rng              = np.random.default_rng(seed)     # same paths for every group
+        unrecoverCost_CM = np.empty((group.stop - group.start, nPaths, term+1))
+        for start in range(0, nPaths, chunkSize):
+            stop    = min(start + chunkSize, nPaths)
+            returns = drawReturns(rng, stop-start, rates[group], vols, corr, term)
+            growth  = np.cumprod(1 + returns[..., :2, :], axis = -1)
+            # Owning ##########################################################
+            value_CM  = housePrice[group]*growth[..., 0, :]
+            profit_CM = value_CM - housePrice[group]*(1 - equity_frc[group]) - cost_CM[group]
+            # Renting and investing the difference ############################
+            rent_PM       = startRent[group]*growth[..., 1, 12*(months//12)]
+            relBuyCost_PM = cost_PM[group] - rent_PM
+            value_CIP     = compoundGrowth(relBuyCost_PM, returns[..., 2, :])
+            unrecoverCost_CM[:, start:stop] = value_CIP - relBuyCost_PM.cumsum(axis = -1) - profit_CM
+        bands[:, group]    = np.percentile(unrecoverCost_CM, percentiles, axis = -2)
+        breakEven_M[group] = breakEvenMonth(unrecoverCost_CM)
+
+    # Paths broken even by every month, counted per batch point ##############
+    month  = np.where(np.isnan(breakEven_M), term+1, breakEven_M).astype(int)
+    counts = np.bincount((month + (term+2)*np.arange(nBatch)[:, None]).reshape(-1), \
+                         minlength = nBatch*(term+2)).reshape(nBatch, term+2)
+    result = mcResult(percentiles, months, \
+                      unrecoverCost_CM = bands.reshape((len(percentiles),) + batch + (term+1,)))
+    result.breakEven_M   = breakEven_M.reshape(batch + (nPaths,))
+    result.breakEven_CDF = (np.cumsum(counts[:, :term+1], axis = -1)/nPaths).reshape(batch + (term+1,))
+    return result
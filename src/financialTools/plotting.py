@@ -0,0 +1,15 @@
+"""
+###############################################################################
+Code for the plotting layer of the financial tools.
+###############################################################################
+"""
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+from matplotlib.gridspec import GridSpec
+from src.frmtFig import frmtFig 
+CODENAME = 'plotting'
+
+# The model modules import this layer only from their plotting methods, so 
+# the figure format below is set on the first plot and not on import.
+clrPts, mpl, plt = frmtFig(mpl, plt, FS_title = 18, FS_tickLabel = 18, FS_axisLabel = 18)
@@ -0,0 +1,165 @@
+"""
+###############################################################################
+Code for profiling the stages of the models.
+###############################################################################
+"""
+
+import json
+import time
+import logging
+import threading
+import functools
+import tracemalloc
+CODENAME = 'profiling'
+
+INCOMEDIST_STAGES = ['det401contribution', 'deductTaxes', 'deductExpenses', \
+                     'detTreasurycontribution', 'splitIncome', 'invest']
+
+# %% Common Functions #########################################################
+def getProfiledStages():
+    """ Model class -> the methods profiled: the constructor and every stage. """
+    from src.financialTools.houseOwnCost import homeOwnership, renting, rentVSbuy
+    from src.financialTools.investments import incomeDist
+    stages = {cls: ['__init__'] + list(cls.stages) for cls in [homeOwnership, renting, rentVSbuy]}
+    stages[homeOwnership].append('getTaxCredit')
+    stages[incomeDist] = ['__init__'] + INCOMEDIST_STAGES
+    return stages
+
+# %% Stage Patches ############################################################
+# The stages are patched once for all enabled profilers, and restored when
+# the last of them is disabled. Every call is recorded by each profiler
+# enabled at the time. 
+ACTIVE    = []
+ORIGINALS = {}
+PATCHLOCK = threading.RLock()
+TRACING   = {'started': False}
+
+def wrapStage(key, method):
+    @functools.wraps(method)
+    def profiled(*args, **kwargs):
+        profilers = list(ACTIVE)
+        memory    = any(x.memory for x in profilers) and tracemalloc.is_tracing()
+        mem0      = tracemalloc.get_traced_memory()[0] if memory else 0
+        t0        = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            dt   = time.perf_counter() - t0
+            dmem = tracemalloc.get_traced_memory()[0] - mem0 if memory else 0
+            for profiler in profilers:
+                profiler.record(key, dt, dmem)
+    profiled.profiledStage = method
+    return profiled
+
+def patchStages():
+    for cls, names in getProfiledStages().items():
+        for name in names:
+            ORIGINALS[(cls, name)] = cls.__dict__[name]
+            setattr(cls, name, wrapStage(f'{cls.__name__}.{name}', cls.__dict__[name]))
+
+def restoreStages():
+    for (cls, name), method in ORIGINALS.items():
+        if getattr(cls.__dict__.get(name), 'profiledStage', None) is not method:
+            logging.error(f'profiling:restoreStages:: {cls.__name__}.{name} was replaced while profiled, leaving it.')
+            continue
+        setattr(cls, name, method)
+    ORIGINALS.clear()
+
+# %% Stage Profiler ###########################################################
+class stageProfiler:
+    """ Call counts, cumulative wall time and, with memory = True, net bytes
+    allocated of every model stage across all instances, while enabled. The
+    stages are only wrapped while a profiler is enabled, so the models run
+    untouched otherwise. Profilers may be nested or overlap, each records
+    the calls made while it is enabled. Times of a stage include the stages
+    it calls.
+    """
+    def __init__(self, memory = False):
+        self.memory    = memory
+        self.records   = {}
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    @property
+    def enabled(self):
+        return self in ACTIVE
+
+    def enable(self):
+        with PATCHLOCK:
+            if self.enabled:
+                return
+            if self.memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                TRACING['started'] = True
+            if len(ACTIVE) == 0:
+                patchStages()
+            ACTIVE.append(self)
+
+    def disable(self):
+        with PATCHLOCK:
+            if not self.enabled:
+                return
+            ACTIVE.remove(self)
+            if len(ACTIVE) == 0:
+                restoreStages()
+            if TRACING['started'] and not any(x.memory for x in ACTIVE):
+                tracemalloc.stop()
+                TRACING['started'] = False
+
+    def record(self, key, dt, dmem):
+        record = self.records.setdefault(key, {'calls': 0, 'time_s': 0.0, 'alloc_B': 0})
+        record['time_s']  += dt
+        record['calls']   += 1
+        record['alloc_B'] += dmem if self.memory else 0
+
+    def reset(self):
+        for record in self.records.values():
+            record.update({'calls': 0, 'time_s': 0.0, 'alloc_B': 0})
+
+    def table(self):
+        """ Stages that ran, slowest first, as a printable table. """
+        lines = [f"{'stage':42s} {'calls':>8s} {'total (ms)':>12s} {'per call (us)':>14s} {'alloc (MB)':>11s}"]
+        for key, x in sorted(self.records.items(), key = lambda item: -item[1]['time_s']):
+            if x['calls'] > 0:
+                lines.append(f"{key:42s} {x['calls']:8d} {x['time_s']*1E3:12.3f} "\
+                             f"{x['time_s']/x['calls']*1E6:14.1f} {x['alloc_B']/1E6:11.3f}")
+        return '\n'.join(lines)
+
+    def toJSON(self, path = None):
+        """ Records of the stages that ran as a JSON string, also written to
+        path if given.
+        """
+        records = {key: x for key, x in self.records.items() if x['calls'] > 0}
+        text    = json.dumps(records, indent = 2)
+        if path is not None:
+            with open(path, 'w') as file:
+                file.write(text)
+        return text
+
+# %% Global Switch ############################################################
+PROFILER = None
+
+def enableProfiling(memory = False):
+    """ Start profiling every model stage until disableProfiling. Returns the
+    profiler holding the records.
+    """
+    global PROFILER
+    if PROFILER is not None:
+        logging.error('profiling:enableProfiling:: profiling is already enabled.')
+        return PROFILER
+    PROFILER = stageProfiler(memory = memory)
+    PROFILER.enable()
+    return PROFILER
+
+def disableProfiling():
+    global PROFILER
+    profiler = PROFILER
+    if profiler is not None:
+        profiler.disable()
+    PROFILER = None
+    return profiler
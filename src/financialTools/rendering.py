@@ -0,0 +1,201 @@
+"""
+###############################################################################
+Code for rendering batches of figures to files without a display.
+###############################################################################
+"""
+
+import os
+import logging
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+CODENAME = 'rendering'
+
+RENDER_FIGSIZE = {'lossMap': (8, 6), 'houseTrend': (12, 6), 'rentVSbuyTrend': (12, 6), 'growth': (12, 6)}
+WHITE          = (1, 1, 1)
+
+# %% Common Functions #########################################################
+def decimate(x, y, nPoints):
+    """ Every k-th point of a curve along its last axis, with the last point
+    kept, so that about nPoints remain. Curves are not drawn finer than the
+    pixels of the figure anyway.
+    """
+    n = np.shape(x)[-1]
+    if n <= nPoints:
+        return x, y
+    idx = np.unique(np.append(np.arange(0, n, int(np.ceil(n/nPoints))), n-1))
+    return np.asarray(x)[..., idx], np.asarray(y)[..., idx]
+
+def decimateGrid(x, y, z, shape):
+    """ Strided (rows, columns) of a gridded z no finer than shape. """
+    sy = max(1, int(np.ceil(np.shape(z)[0]/shape[0])))
+    sx = max(1, int(np.ceil(np.shape(z)[1]/shape[1])))
+    return x[::sx], y[::sy], z[::sy, ::sx]
+
+# %% Figure Templates #########################################################
+TEMPLATES = {}
+
+def getTemplate(kind, dpi):
+    """ Figure and axes of a kind, made once per process and reused. They are
+    drawn on the Agg canvas directly, so no display or figure manager is
+    needed. Call it within getStyle, which sets the format of the figure.
+    """
+    key = (kind, dpi)
+    if key not in TEMPLATES:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure(figsize = RENDER_FIGSIZE[kind], dpi = dpi)
+        FigureCanvasAgg(fig)
+        if kind == 'lossMap':
+            gs  = fig.add_gridspec(1, 2, width_ratios = [20, 1])
+            axs = [fig.add_subplot(gs[0, 0]), fig.add_subplot(gs[0, 1])]
+        else:
+            axs = [fig.add_subplot(1, 1, 1)]
+        TEMPLATES[key] = (fig, axs)
+    fig, axs = TEMPLATES[key]
+    for ax in axs:
+        ax.cla()
+    return fig, axs
+
+def getStyle():
+    """ Context applying the frmtFig format on top of the matplotlib defaults,
+    leaving the global rcParams of the caller alone, and the point colors.
+    """
+    import matplotlib.style
+    from src.frmtFig import getFigStyle
+    clrPts, style = getFigStyle(FS_title = 18, FS_tickLabel = 18, FS_axisLabel = 18)
+    return matplotlib.style.context(['default', style]), clrPts
+
+def getPixels(fig, ax):
+    """ Size (width, height) of an axes in pixels. """
+    bbox = ax.get_position()
+    return int(bbox.width*fig.get_figwidth()*fig.dpi), int(bbox.height*fig.get_figheight()*fig.dpi)
+
+# %% Figure Data ##############################################################
+def getLossMapData(housePrice, mortgageRate, loss, contour = 0, title = '', label = 'Loss ($ M)'):
+    """ Loss (mortgageRate x housePrice) of one horizon of a loss map. """
+    return {'housePrice': np.asarray(housePrice), 'mortgageRate': np.asarray(mortgageRate), \
+            'loss': np.asarray(loss), 'contour': contour, 'title': title, 'label': label}
+
+def getHouseTrendData(house):
+    """ Series of homeOwnership.plotTermTrend. """
+    return {'years': house.months/12, 'downPay': house.downPay, 'cost_CM_prnc': house.cost_CM_prnc, \
+            'cost_CM_debt': house.cost_CM_debt, 'cost_CM_pTax': house.cost_CM_pTax, \
+            'cost_CM_main': house.cost_CM_main, 'cost_CM': house.cost_CM, \
+            'saleValue_CM_val': house.saleValue_CM_val, 'unrecoverCost_CM': house.unrecoverCost_CM}
+
+def getRentVSbuyTrendData(model):
+    """ Series of rentVSbuy.plotTermTrend. """
+    return {'years': model.rental.months/12, 'rent_CM': model.rental.cost_CM, 'own_CM': model.house.cost_CM, \
+            'profitRent_CM': model.hyInvst.profit_CIP, 'profitOwn_CM': model.house.profit_CM, \
+            'unrecoverCost_CM': model.unrecoverCost_CM}
+
+def getGrowthData(portfolio):
+    """ Account values of an invstPortfolio, as in plotGrowth_value('all'). """
+    return {'years': portfolio.months/12, 'names': list(portfolio.names), 'values_CIP': portfolio.values_CIP}
+
+# %% Drawing ##################################################################
+def drawLossMap(fig, axs, clrPts, data):
+    from matplotlib.colors import TwoSlopeNorm
+    axs, cax = axs
+    width, height = getPixels(fig, axs)
+    housePrice, mortgageRate, loss = decimateGrid(data['housePrice'], data['mortgageRate'], \
+                                                  data['loss']*1E-6, (height//2, width//2))
+    vmin, vmax = min(np.min(loss), -1E-9), max(np.max(loss), 1E-9)
+    # No more filled levels than the color bar has pixels to tell apart ######
+    levels = min(100, max(8, height//8))
+    CS = axs.contourf(housePrice/1E6, mortgageRate*100, loss, levels = levels, cmap = 'RdBu_r', \
+                      norm = TwoSlopeNorm(vmin = vmin, vcenter = 0, vmax = vmax))
+    if vmin < data['contour'] < vmax:
+        C = axs.contour(housePrice/1E6, mortgageRate*100, loss, levels = [data['contour']], \
+                        colors = 'black', linewidths = 2)
+        axs.clabel(C, inline = True, fmt = '  Loss = $ %0.3f M', fontsize = 14)
+    cbar = fig.colorbar(CS, cax = cax)
+    cbar.set_label(data['label'])
+    axs.set_xlabel('House Price ($ M)')
+    axs.set_ylabel('Mortgage Rate (%)')
+    axs.set_title(data['title'])
+
+def drawHouseTrend(fig, axs, clrPts, data):
+    axs    = axs[0]
+    nPts   = getPixels(fig, axs)[0]
+    years  = data['years']
+    prnc   = data['cost_CM_prnc'] + data['downPay']
+    debt   = prnc + data['cost_CM_debt']
+    misc   = debt + data['cost_CM_pTax'] + data['cost_CM_main']
+    for top, bottom, label in [(prnc, 0*prnc, 'Principal'), (debt, prnc, 'Interest'), (misc, debt, 'Tax and Maintainence')]:
+        x, y = decimate(years, np.array([top, bottom])*1E-6, nPts)
+        axs.fill_between(x, y[0], y[1], ls = '-', linewidth = 4, label = label)
+    for name, style, label in [('cost_CM', '--', 'Cost of Owning'), ('saleValue_CM_val', '-.', 'House Sale Proceeds'), \
+                               ('unrecoverCost_CM', '-', 'Unrecoverable Cost of Owning')]:
+        axs.plot(*decimate(years, data[name]*1E-6, nPts), style, linewidth = 3, color = WHITE, label = label)
+    axs.legend()
+    axs.grid('major')
+    axs.set_ylabel('Million Dollars')
+    axs.set_xlabel('Years')
+    axs.set_title('\n Buying \n')
+    axs.set(xlim = (-5, 35))
+
+def drawRentVSbuyTrend(fig, axs, clrPts, data):
+    axs   = axs[0]
+    nPts  = getPixels(fig, axs)[0]
+    years = data['years']
+    axs.plot(*decimate(years, data['rent_CM']*1E-6, nPts), '--', linewidth = 3, color = clrPts[1], label = 'Cost of Renting')
+    axs.plot(*decimate(years, data['own_CM']*1E-6, nPts), '--', linewidth = 3, color = clrPts[0], label = 'Cost of Owning')
+    axs.plot(*decimate(years, data['profitRent_CM']*1E-6, nPts), '--', linewidth = 2, color = WHITE, label = 'Profit when Renting')
+    axs.plot(*decimate(years, data['profitOwn_CM']*1E-6, nPts), '-.', linewidth = 2, color = WHITE, label = 'Profit when Owning')
+    axs.plot(*decimate(years, data['unrecoverCost_CM']*1E-6, nPts), '-', linewidth = 2, color = WHITE, label = 'Unrcv. Owning Cost')
+    axs.legend()
+    axs.grid('major')
+    axs.set_ylabel('Million Dollars')
+    axs.set_xlabel('Years')
+    axs.set_title('\n Renting v/s Buying \n')
+    axs.set(xlim = (-5, 35))
+    axs.set(ylim = (-0.5, 4))
+
+def drawGrowth(fig, axs, clrPts, data):
+    axs  = axs[0]
+    nPts = getPixels(fig, axs)[0]
+    x, values = decimate(data['years'], data['values_CIP']*1E-6, nPts)
+    for name, value in zip(data['names'], values):
+        axs.plot(x, value, '-', linewidth = 4, label = name)
+    axs.legend()
+    axs.grid('major')
+    axs.set_ylabel('Value (M $)')
+    axs.set_xlabel('Years')
+
+DRAW = {'lossMap': drawLossMap, 'houseTrend': drawHouseTrend, \
+        'rentVSbuyTrend': drawRentVSbuyTrend, 'growth': drawGrowth}
+
+# %% Rendering ################################################################
+def renderFigure(kind, data, path, dpi = 100):
+    """ Draw one figure of a kind on its template and save it to path, in
+    the format of its extension (.png, .svg, ...).
+    """
+    style, clrPts = getStyle()
+    with style:
+        fig, axs = getTemplate(kind, dpi)
+        DRAW[kind](fig, axs, clrPts, data)
+        fig.savefig(path, dpi = dpi, facecolor = fig.get_facecolor())
+    return path
+
+def renderChunk(jobs, dpi):
+    return [renderFigure(kind, data, path, dpi) for kind, data, path in jobs]
+
+def renderFigures(jobs, dpi = 100, nWorkers = None, chunkSize = None):
+    """ Render jobs, a list of (kind, data, path) with kind one of DRAW and
+    data from the matching get...Data function, in parallel worker
+    processes. Every worker reuses one figure per kind. Returns the paths.
+    """
+    for kind, data, path in jobs:
+        if kind not in DRAW:
+            logging.error(f'rendering:renderFigures:: {kind} is not a figure kind.')
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+    nWorkers  = os.cpu_count() if nWorkers is None else nWorkers
+    chunkSize = max(1, int(np.ceil(len(jobs)/(4*nWorkers)))) if chunkSize is None else chunkSize
+    chunks    = [jobs[ii:ii+chunkSize] for ii in range(0, len(jobs), chunkSize)]
+    if nWorkers <= 1 or len(chunks) <= 1:
+        return [path for chunk in chunks for path in renderChunk(chunk, dpi)]
+    with ProcessPoolExecutor(max_workers = nWorkers) as pool:
+        results = list(pool.map(renderChunk, chunks, [dpi]*len(chunks)))
+    return [path for chunk in results for path in chunk]
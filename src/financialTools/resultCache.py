@@ -0,0 +1,154 @@
+"""
+###############################################################################
+Code for caching the outputs of scenario evaluations.
+###############################################################################
+"""
+
+import os
+import glob
+import hashlib
+import logging
+import zipfile
+import numpy as np
+from functools import lru_cache
+from collections import OrderedDict
+from src.financialTools.scenarioRunner import getOutput
+CODENAME = 'resultCache'
+
+# %% Common Functions #########################################################
+@lru_cache(maxsize = None)
+def getCodeVersion():
+    """ Hash of the sources of src.financialTools, so that cached results go
+    stale with any change to the models.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), '*.py'))):
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+def encodeArg(digest, x):
+    """ Feed a canonical encoding of an argument into digest. """
+    if isinstance(x, dict):
+        digest.update(b'dict')
+        for key in sorted(x):
+            encodeArg(digest, key)
+            encodeArg(digest, x[key])
+    elif isinstance(x, (list, tuple)):
+        digest.update(f'seq{len(x)}'.encode())
+        for item in x:
+            encodeArg(digest, item)
+    elif isinstance(x, np.ndarray) or isinstance(x, np.generic):
+        x = np.ascontiguousarray(x)
+        digest.update(f'arr{x.dtype.str}{x.shape}'.encode())
+        digest.update(x.tobytes())
+    else:
+        digest.update(f'{type(x).__name__}:{x!r}'.encode())
+
+def hashArgs(*args, **kwargs):
+    """ Stable hash of arguments (scalars, strings, arrays, lists and dicts of
+    them) and the code version.
+    """
+    digest = hashlib.sha256(getCodeVersion().encode())
+    encodeArg(digest, list(args))
+    encodeArg(digest, kwargs)
+    return digest.hexdigest()
+
+# %% Result Cache #############################################################
+class resultCache:
+    """ Outputs of model evaluations keyed by hashArgs of the model, outputs
+    and parameters. The last maxItems results, of at most maxMemoryBytes in
+    total, stay in memory. With a cacheDir every result is also written 
+    there as an .npz file, and the least recently used files are removed 
+    once they hold more than maxBytes. Cached arrays are read-only copies.
+    """
+    def __init__(self, cacheDir = None, maxItems = 128, maxBytes = 1E9, maxMemoryBytes = 256E6):
+        self.cacheDir       = cacheDir
+        self.maxItems       = maxItems
+        self.maxBytes       = maxBytes
+        self.maxMemoryBytes = maxMemoryBytes
+        self.memory         = OrderedDict()
+        self.memoryBytes    = 0
+        self.stats          = {'memoryHits': 0, 'diskHits': 0, 'misses': 0}
+        if cacheDir is not None:
+            os.makedirs(cacheDir, exist_ok = True)
+
+    def getPath(self, key):
+        return os.path.join(self.cacheDir, key + '.npz')
+
+    def get(self, key):
+        """ Cached outputs as a new dict of read-only arrays, or None. """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.stats['memoryHits'] += 1
+            return dict(self.memory[key])
+        if self.cacheDir is not None and os.path.exists(self.getPath(key)):
+            try:
+                with np.load(self.getPath(key)) as file:
+                    result = {name: file[name] for name in file.files}
+            except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+                logging.error(f'resultCache:resultCache::get::: {self.getPath(key)} is corrupt, removing it.')
+                os.remove(self.getPath(key))
+                self.stats['misses'] += 1
+                return None
+            os.utime(self.getPath(key))
+            self.stats['diskHits'] += 1
+            return self.putMemory(key, result)
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, key, result):
+        """ Cache result and return it as a new dict of read-only arrays. """
+        result = self.putMemory(key, {name: np.array(x) for name, x in result.items()})
+        if self.cacheDir is not None:
+            # Written next to its path and renamed, so a file is never partial 
+            temp = f'{self.getPath(key)}.{os.getpid()}.tmp'
+            with open(temp, 'wb') as file:
+                np.savez(file, **result)
+            os.replace(temp, self.getPath(key))
+            self.evictDisk()
+        return result
+
+    def putMemory(self, key, result):
+        for x in result.values():
+            x.flags.writeable = False
+        if key in self.memory:
+            self.memoryBytes -= sum(x.nbytes for x in self.memory.pop(key).values())
+        self.memory[key]  = result
+        self.memoryBytes += sum(x.nbytes for x in result.values())
+        while len(self.memory) > self.maxItems or self.memoryBytes > self.maxMemoryBytes:
+            self.memoryBytes -= sum(x.nbytes for x in self.memory.popitem(last = False)[1].values())
+            if len(self.memory) == 0:
+                break
+        return dict(result)
+
+    def evictDisk(self):
+        files = sorted(glob.glob(os.path.join(self.cacheDir, '*.npz')), key = os.path.getmtime)
+        total = sum(os.path.getsize(x) for x in files)
+        while total > self.maxBytes and len(files) > 1:
+            path  = files.pop(0)
+            total = total - os.path.getsize(path)
+            os.remove(path)
+
+    def clear(self, disk = False):
+        self.memory.clear()
+        self.memoryBytes = 0
+        if disk and self.cacheDir is not None:
+            for path in glob.glob(os.path.join(self.cacheDir, '*.npz')):
+                os.remove(path)
+
+    def evaluate(self, model, outputs, **params):
+        """ Outputs (dotted paths) of model(**params) as a dict of read-only
+        arrays, from the cache when the same model, outputs and parameters were
+        evaluated before with the same code.
+        """
+        key    = hashArgs(model.__module__, model.__qualname__, list(outputs), **params)
+        result = self.get(key)
+        if result is not None:
+            return result
+        instance = model(**params)
+        result   = {output: np.asarray(getOutput(instance, output)) for output in outputs}
+        if any(x.dtype == object for x in result.values()):
+            logging.error('resultCache:resultCache::evaluate::: outputs need to be numeric arrays.')
+            return result
+        return self.put(key, result)
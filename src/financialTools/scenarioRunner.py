@@ -0,0 +1,126 @@
+"""
+###############################################################################
+Code for running scenario batches across worker processes.
+###############################################################################
+"""
+
+import os
+import logging
+import numpy as np
+from functools import reduce
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+CODENAME = 'scenarioRunner'
+
+# %% Common Functions #########################################################
+def getOutput(model, output):
+    """ Attribute of a model given by a dotted path, e.g. 'house.profit_CM'. """
+    return reduce(getattr, output.split('.'), model)
+
+def getMonths(months, nMonth):
+    """ Requested months as indices into a series of nMonth months. Negative
+    months count from the end. Returns the indices and which of them exist.
+    """
+    month = np.array([x if x >= 0 else nMonth + x for x in months], dtype = int)
+    valid = np.flatnonzero((month >= 0) & (month < nMonth))
+    return month, valid
+
+# %% Compact Result ###########################################################
+class compactResult:
+    """ Requested outputs of one or a batch of scenarios at the requested 
+    months only, in one (*batch, outputs, months) array. Use it in place of
+    the model to keep many scenarios around.
+    """
+    __slots__ = ('data', 'outputs', 'months')
+
+    def __init__(self, data, outputs, months):
+        self.data    = data
+        self.outputs = tuple(outputs)
+        self.months  = tuple(months)
+
+    @classmethod
+    def fromModel(cls, model, outputs, months, dtype = np.float32):
+        """ Keep outputs (dotted paths) of a model at months. Months past the
+        end of an output are nan and negative months count from its end.
+        """
+        values = [np.asarray(getOutput(model, output)) for output in outputs]
+        batch  = np.broadcast_shapes(*[np.shape(x)[:-1] for x in values])
+        data   = np.full(batch + (len(outputs), len(months)), np.nan, dtype = dtype)
+        for jj, value in enumerate(values):
+            month, valid = getMonths(months, np.shape(value)[-1])
+            data[..., jj, valid] = value[..., month[valid]]
+        return cls(data, outputs, months)
+
+    @property
+    def nScenarios(self):
+        return int(np.prod(np.shape(self.data)[:-2]))
+
+    @property
+    def bytesPerScenario(self):
+        return self.data.nbytes/max(1, self.nScenarios)
+
+    def get(self, output, month = None):
+        """ An output at every kept month, or at one of them. """
+        if output not in self.outputs:
+            logging.error(f'scenarioRunner:compactResult::get::: {output} was not kept.')
+            raise KeyError(output)
+        value = self.data[..., self.outputs.index(output), :]
+        if month is None:
+            return value
+        if month not in self.months:
+            logging.error(f'scenarioRunner:compactResult::get::: month {month} was not kept.')
+            raise KeyError(month)
+        return value[..., self.months.index(month)]
+
+# %% Workers ##################################################################
+def runChunk(shmName, shape, dtype, evalChunk, start, stop, args, kwargs):
+    """ Evaluate one chunk in a worker and write it into the shared result. """
+    shm = shared_memory.SharedMemory(name = shmName)
+    try:
+        result = np.ndarray(shape, dtype = dtype, buffer = shm.buf)
+        result[start:stop] = evalChunk(start, stop, *args, **kwargs)
+        del result
+    finally:
+        shm.close()
+    return stop - start
+
+def getChunkArgs(items, start, stop, args):
+    return tuple(args) if items is None else (items[start:stop],) + tuple(args)
+
+def runScenarios(evalChunk, nItems, itemShape = (), args = (), kwargs = {}, \
+                 nWorkers = None, chunkSize = None, dtype = float, items = None):
+    """ Evaluate evalChunk(start, stop, *args, **kwargs) -> (stop-start, *itemShape)
+    over range(nItems) in chunks on a process pool. Workers write their chunk
+    straight into a shared memory array, so only the arguments and a count
+    travel between processes. With items, a sequence of the nItems inputs 
+    (e.g. the scenarios), evalChunk(start, stop, items[start:stop], *args,
+    **kwargs) is called instead, so every chunk only carries its own slice.
+    evalChunk needs to be a module level function.
+    """
+    nWorkers  = os.cpu_count() if nWorkers is None else nWorkers
+    shape     = (nItems,) + tuple(itemShape)
+    if chunkSize is None:
+        chunkSize = max(1, int(np.ceil(nItems/(4*nWorkers))))
+    if nWorkers <= 1 or nItems <= chunkSize:
+        result = np.empty(shape, dtype = dtype)
+        for start in range(0, nItems, chunkSize):
+            stop = min(start + chunkSize, nItems)
+            result[start:stop] = evalChunk(start, stop, *getChunkArgs(items, start, stop, args), **kwargs)
+        return result
+
+    nBytes = max(1, int(np.prod(shape))*np.dtype(dtype).itemsize)
+    shm    = shared_memory.SharedMemory(create = True, size = nBytes)
+    try:
+        with ProcessPoolExecutor(max_workers = nWorkers) as pool:
+            futures = [pool.submit(runChunk, shm.name, shape, dtype, evalChunk, \
+                                   start, min(start + chunkSize, nItems), \
+                                   getChunkArgs(items, start, min(start + chunkSize, nItems), args), kwargs) \
+                       for start in range(0, nItems, chunkSize)]
+            nDone = sum(x.result() for x in futures)
+        if nDone != nItems:
+            logging.error('scenarioRunner:runScenarios:: some chunks were not evaluated.')
+        result = np.ndarray(shape, dtype = dtype, buffer = shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+    return result
@@ -0,0 +1,70 @@
+"""
+###############################################################################
+Code for solving rentVSbuy for break-even points.
+###############################################################################
+"""
+
+import logging
+import numpy as np
+from src.financialTools.houseOwnCost import rentVSbuy, breakEvenMonth
+from src.financialTools.scenarioRunner import getOutput
+CODENAME = 'solver'
+
+SOLVER_PARAMS = ['housePrice', 'downPay', 'startRent', 'mortgageRate', 'propTaxRate', \
+                 'maintainRate', 'realEstateAppRate', 'rentAppRate', 'invstAppRate', 'annualIncome']
+
+# %% Common Functions #########################################################
+def getBreakEvenMonth(model, output = 'unrecoverCost_CM'):
+    """ Break-even month of every scenario of a batched rentVSbuy, read off
+    the cumulative output given. nan where it never breaks even.
+    """
+    return breakEvenMonth(getOutput(model, output))
+
+def evalAt(param, value, month, output, params):
+    """ output of a lazy rentVSbuy at the given month with param = value. """
+    params = dict(params)
+    params[param] = value
+    if 'downPayRate' in params:
+        params['downPay'] = params.pop('downPayRate')*np.asarray(params['housePrice'])
+    model  = rentVSbuy(lazy = True, **params)
+    return getOutput(model, output)[..., month]
+
+# %% Solver ###################################################################
+def solveBreakEven(param, lo, hi, month = -1, target = 0, output = 'unrecoverCost_CM', \
+                   tol = 1E-6, maxIter = 100, **params):
+    """ Value of param in [lo, hi] at which output reaches target at the given
+    month (by default the unrecoverable cost of buying is 0 at the end of the
+    term). The other keyword arguments are rentVSbuy parameters and may be
+    broadcastable arrays, with downPayRate as a fraction of housePrice. All
+    scenarios are bisected together, one batched rentVSbuy per step, until the
+    brackets are narrower than tol relative to hi-lo. Returns nan where the
+    bracket does not hold a sign change.
+    """
+    if param not in SOLVER_PARAMS:
+        logging.error(f'solver:solveBreakEven:: {param} is not a rentVSbuy parameter to solve for.')
+        raise KeyError(param)
+    if param == 'housePrice' and 'downPay' in params:
+        logging.error('solver:solveBreakEven:: give downPayRate instead of downPay when solving for housePrice.')
+        return
+
+    f_lo   = evalAt(param, lo, month, output, params) - target
+    f_hi   = evalAt(param, hi, month, output, params) - target
+    lo, hi, f_lo, f_hi = np.broadcast_arrays(np.asarray(lo, dtype = float), np.asarray(hi, dtype = float), f_lo, f_hi)
+    lo, hi, f_lo = lo.copy(), hi.copy(), f_lo.copy()
+    bracket = np.sign(f_lo)*np.sign(f_hi) <= 0
+    width   = tol*np.abs(hi - lo)
+    # Brackets ending on a root are frozen there ############################
+    hi      = np.where(f_lo == 0, lo, hi)
+    lo      = np.where(f_hi == 0, hi, lo)
+    done    = (f_lo == 0) | (f_hi == 0)
+    for ii in range(maxIter):
+        mid   = (lo + hi)/2
+        f_mid = evalAt(param, mid, month, output, params) - target
+        done  = done | (f_mid == 0)
+        left  = np.sign(f_mid) == -np.sign(f_lo)
+        hi    = np.where(done | left, mid, hi)
+        lo    = np.where(done | ~left, mid, lo)
+        f_lo  = np.where(left, f_lo, f_mid)
+        if np.all(np.abs(hi - lo) <= width):
+            break
+    return np.where(bracket, (lo + hi)/2, np.nan)[()]
@@ -0,0 +1,124 @@
+"""
+###############################################################################
+Code for models evaluated in stages.
+###############################################################################
+"""
+
+import copy
+import logging
+import numpy as np
+from src.financialTools.export import seriesExport
+CODENAME = 'stagedModel'
+
+# %% Staged Model #############################################################
+class stagedModel(seriesExport):
+    """ Base of the models built by a sequence of stage methods. stages maps
+    every stage method, in order, to the attributes it sets. An eager model
+    runs all stages on construction. A lazy model runs a stage the first time
+    one of its attributes is read, and keeps the result.
+    inputs maps every stage to the parameters and outputs it reads. Setting
+    one of them drops the outputs of the stages downstream, which are then
+    recomputed when read. children maps outputs holding a model to the
+    parameters forwarded to it: the child is updated in place of being
+    rebuilt. fixedParams set the timeline and can not change.
+    """
+    stages      = {}
+    inputs      = {}
+    children    = {}
+    fixedParams = ()
+
+    def runStages(self):
+        for stage in self.stages:
+            getattr(self, stage)()
+
+    def __getattr__(self, name):
+        # Only called for attributes that are not set yet ##################
+        stage = self.getStage(name)
+        if stage is None:
+            raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+        getattr(self, stage)()
+        if name not in self.__dict__:
+            raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+        return self.__dict__[name]
+
+    def __setattr__(self, name, value):
+        # Nothing can depend on an attribute set for the first time ###########
+        if name not in self.__dict__:
+            self.__dict__[name] = value
+            return
+        if name in self.fixedParams:
+            logging.error(f'stagedModel:{type(self).__name__}::__setattr__::: {name} is fixed, build a new model instead.')
+            raise AttributeError(name)
+        self.__dict__[name] = value
+        self.invalidate(name)
+
+    def invalidate(self, name):
+        """ Drop the stages reading name, forwarding it to the children that
+        take it.
+        """
+        for stage in self.getReaders(name):
+            child = self.getChild(stage, name)
+            if child is None:
+                self.dropStage(stage)
+            else:
+                model = copy.copy(self.__dict__[child])
+                setattr(model, self.children[child][name], self.__dict__[name])
+                self.__dict__[child] = model
+                self.invalidate(child)
+
+    def dropStage(self, stage):
+        outputs = [x for x in self.stages[stage] if x in self.__dict__]
+        for output in outputs:
+            del self.__dict__[output]
+        for output in outputs:
+            self.invalidate(output)
+
+    def getChild(self, stage, name):
+        for output in self.stages[stage]:
+            if output in self.children and name in self.children[output] and output in self.__dict__:
+                return output
+        return None
+
+    def getSeries(self):
+        """ Every stage output that is a monthly series, and those of the
+        models among them as model.series. Runs the stages not run yet.
+        """
+        series  = {}
+        nMonths = len(self.months)
+        for stage, outputs in self.stages.items():
+            if not any(x in self.__dict__ for x in outputs):
+                getattr(self, stage)()
+            for name in outputs:
+                value = self.__dict__.get(name)
+                if hasattr(value, 'getSeries'):
+                    series.update({f'{name}.{x}': y for x, y in value.getSeries().items()})
+                elif isinstance(value, np.ndarray) and np.ndim(value) > 0 and np.shape(value)[-1] == nMonths:
+                    series[name] = value
+        return series
+
+    def withParams(self, **params):
+        """ Copy with some parameters changed. Only the stages downstream of
+        them are recomputed, the rest is shared with this model.
+        """
+        model = copy.copy(self)
+        for name, value in params.items():
+            setattr(model, name, value)
+        return model
+
+    @classmethod
+    def getStage(cls, name):
+        for stage, outputs in cls.stages.items():
+            if name in outputs:
+                return stage
+        return None
+
+    @classmethod
+    def getReaders(cls, name):
+        """ Stages reading name, from a table built once per class. """
+        if '_readers' not in cls.__dict__:
+            readers = {}
+            for stage, inputs in cls.inputs.items():
+                for x in inputs:
+                    readers.setdefault(x, []).append(stage)
+            cls._readers = readers
+        return cls._readers.get(name, ())
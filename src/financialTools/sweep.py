@@ -0,0 +1,238 @@
+"""
+###############################################################################
+Code for sweeping rentVSbuy over parameter grids.
+###############################################################################
+"""
+
+import os
+import json
+import logging
+import numpy as np
+from src.financialTools.houseOwnCost import rentVSbuy
+from src.financialTools.scenarioRunner import getOutput, getMonths, runScenarios
+from src.financialTools.resultCache import hashArgs
+CODENAME = 'sweep'
+
+SWEEP_PARAMS = ['housePrice', 'downPay', 'downPayRate', 'startRent', 'term',\
+                'mortgageRate', 'propTaxRate', 'maintainRate', 'realEstateAppRate',\
+                'rentAppRate', 'invstAppRate', 'annualIncome']
+
+# %% Labeled Array ############################################################
+class labeledArray:
+    """ N-D array with a name and coordinates for every axis.
+    """
+    __slots__ = ('data', 'dims', 'coords')
+
+    def __init__(self, data, dims, coords):
+        self.data   = data
+        self.dims   = list(dims)
+        self.coords = {dim: np.asarray(coords[dim]) for dim in self.dims}
+
+    @property
+    def shape(self):
+        return np.shape(self.data)
+
+    @property
+    def bytesPerScenario(self):
+        """ Bytes of data per grid point, over the axes other than 'output'
+        and 'month'.
+        """
+        nPoints = np.prod([len(self.coords[dim]) for dim in self.dims if dim not in ('output', 'month')])
+        return self.data.nbytes/max(1, int(nPoints))
+
+    def sel(self, **kwargs):
+        """ Select by coordinate value. A list of values keeps the axis, a
+        single value drops it.
+        """
+        data   = self.data
+        dims   = list(self.dims)
+        coords = dict(self.coords)
+        for dim, value in kwargs.items():
+            axis = dims.index(dim)
+            if np.ndim(value) == 0:
+                data = np.take(data, self.index(dim, value), axis = axis)
+                dims.pop(axis)
+                coords.pop(dim)
+            else:
+                idx  = [self.index(dim, x) for x in value]
+                data = np.take(data, idx, axis = axis)
+                coords[dim] = coords[dim][idx]
+        if len(dims) == 0:
+            return data
+        return labeledArray(data, dims, coords)
+
+    def index(self, dim, value):
+        coord = self.coords[dim]
+        if coord.dtype.kind in 'US':
+            idx = np.flatnonzero(coord == value)
+        else:
+            idx = np.flatnonzero(np.isclose(coord, value))
+        if len(idx) == 0:
+            logging.error(f'sweep:labeledArray::index::: {value} is not a coordinate of {dim}.')
+            raise KeyError(value)
+        return int(idx[0])
+
+# %% Sweep ####################################################################
+def getGrid(grid):
+    """ Axes of a Cartesian grid. Array valued parameters become axes in the
+    order given, scalars stay fixed.
+    """
+    for name in grid:
+        if name not in SWEEP_PARAMS:
+            logging.error(f'sweep:getGrid:: {name} is not a rentVSbuy parameter.')
+            raise KeyError(name)
+    axes  = {name: np.asarray(x) for name, x in grid.items() if np.ndim(x) > 0}
+    fixed = {name: x for name, x in grid.items() if np.ndim(x) == 0}
+    return axes, fixed
+
+def checkOutputs(axes, fixed, outputs, taxCredits = True):
+    """ Raise a ValueError for outputs without a month axis (e.g. buyLoss or
+    brekEvenPoint), judged at the first point of the grid.
+    """
+    params = dict(fixed)
+    params.update({name: x[0] for name, x in axes.items()})
+    if 'downPayRate' in params:
+        params['downPay'] = params.pop('downPayRate')*params['housePrice']
+    term   = int(params.pop('term', 30))
+    model  = rentVSbuy(term = term, taxCredits = taxCredits, lazy = True, **params)
+    bad    = [x for x in outputs if np.ndim(getOutput(model, x)) == 0 or np.shape(getOutput(model, x))[-1] != term*12+1]
+    if len(bad) > 0:
+        logging.error(f'sweep:checkOutputs:: {bad} have no month axis.')
+        raise ValueError(f'outputs {bad} have no month axis, sweep monthly series such as unrecoverCost_CM.')
+
+def evalGrid(start, stop, axes, fixed, outputs, months, taxCredits = True, dtype = float):
+    """ Outputs on the block of the grid with rows [start, stop) of the first
+    axis, as an array of shape (stop-start, *rest, len(outputs), len(months)).
+    Every other axis enters rentVSbuy as a broadcast dimension, so a stage only
+    grows with the axes it depends on. Months past the term of a point are nan
+    and negative months count from its end.
+    """
+    names  = list(axes)
+    values = dict(axes)
+    if len(names) > 0:
+        values[names[0]] = values[names[0]][start:stop]
+    shape  = tuple(len(values[name]) for name in names)
+    params = dict(fixed)
+    for ii, name in enumerate(names):
+        if name != 'term':
+            params[name] = values[name].reshape([-1 if jj == ii else 1 for jj in range(len(names))])
+    if 'downPayRate' in params:
+        params['downPay'] = params.pop('downPayRate')*np.asarray(params['housePrice'])
+    terms  = values['term'] if 'term' in values else [params.pop('term', 30)]
+    
+    result = np.full(shape + (len(outputs), len(months)), np.nan, dtype = dtype)
+    for kk, termVal in enumerate(terms):
+        model  = rentVSbuy(term = int(termVal), taxCredits = taxCredits, lazy = True, **params)
+        month, valid = getMonths(months, int(termVal)*12+1)
+        index  = [slice(None)]*len(names)
+        if 'term' in values:
+            index[names.index('term')] = slice(kk, kk+1)
+        shapeTerm = np.shape(result[tuple(index)])[:len(names)]
+        for jj, output in enumerate(outputs):
+            value = getOutput(model, output)[..., month[valid]]
+            result[tuple(index) + (jj, valid)] = np.broadcast_to(value, shapeTerm + (len(valid),))
+    return result
+
+def rentVSbuySweep(outputs = ['unrecoverCost_CM'], months = [12, 60, -1], \
+                   chunkSize = 16384, taxCredits = True, dtype = float, nWorkers = 1, \
+                   store = None, overwrite = False, **grid):
+    """ Evaluate rentVSbuy on the Cartesian grid of the array valued keyword
+    arguments (see SWEEP_PARAMS), in blocks of rows of the first axis holding
+    about chunkSize points. With nWorkers > 1 the blocks run on a process 
+    pool. With a store path the result goes block by block into a sweep 
+    store on disk (see openSweep), and a rerun of an interrupted sweep only
+    evaluates the missing blocks. Outputs need a month axis, others raise a
+    ValueError up front. A store holding a different sweep raises a
+    ValueError, unless overwrite = True, which starts it over. Returns a 
+    labeledArray with the grid axes
+    followed by 'output' and 'month', memory mapped when stored.
+    """
+    axes, fixed = getGrid(grid)
+    checkOutputs(axes, fixed, outputs, taxCredits = taxCredits)
+    shape  = tuple(len(x) for x in axes.values())
+    nRows  = shape[0] if len(shape) > 0 else 1
+    step   = max(1, chunkSize // int(np.prod(shape[1:])))
+    if nWorkers > 1:
+        step = min(step, max(1, int(np.ceil(nRows/(4*nWorkers)))))
+    coords = dict(axes)
+    coords['output'] = np.array(outputs)
+    coords['month']  = np.array(months)
+    dims   = list(axes) + ['output', 'month']
+    if store is not None:
+        return storeSweep(store, axes, fixed, outputs, months, dims, coords, step, \
+                          taxCredits = taxCredits, dtype = dtype, nWorkers = nWorkers, \
+                          overwrite = overwrite)
+    data   = runScenarios(evalGrid, nRows, shape[1:] + (len(outputs), len(months)), \
+                          args = (axes, fixed, outputs, months), \
+                          kwargs = {'taxCredits': taxCredits, 'dtype': dtype}, \
+                          nWorkers = nWorkers, chunkSize = step, dtype = dtype)
+    return labeledArray(data.reshape(shape + (len(outputs), len(months))), dims, coords)
+
+# %% Sweep Store ##############################################################
+def writeManifest(store, manifest):
+    """ Replace the manifest in one step, so a kill never leaves half of it. """
+    with open(store + '.json.tmp', 'w') as file:
+        json.dump(manifest, file)
+    os.replace(store + '.json.tmp', store + '.json')
+
+def storeSweep(store, axes, fixed, outputs, months, dims, coords, step, \
+               taxCredits = True, dtype = float, nWorkers = 1, overwrite = False):
+    """ Evaluate the blocks of a sweep missing from the store at path store
+    (store.npy for the data, store.json for the manifest of finished blocks).
+    A store of a different sweep is started over with overwrite = True.
+    """
+    shape    = tuple(len(x) for x in axes.values())
+    nRows    = shape[0] if len(shape) > 0 else 1
+    rowShape = shape[1:] + (len(outputs), len(months))
+    key      = hashArgs(axes, fixed, list(outputs), list(months), taxCredits, np.dtype(dtype).str)
+    block    = step*max(1, nWorkers)
+    manifest = None
+    if os.path.exists(store + '.json'):
+        with open(store + '.json') as file:
+            manifest = json.load(file)
+        if manifest['key'] != key:
+            if not overwrite:
+                logging.error(f'sweep:storeSweep:: {store} holds a different sweep.')
+                raise ValueError(f'{store} holds a different sweep, pass overwrite = True to replace it.')
+            manifest = None
+    if manifest is not None:
+        data = np.lib.format.open_memmap(store + '.npy', mode = 'r+')
+    else:
+        manifest = {'key': key, 'dims': dims, 'blockRows': block, 'done': [], \
+                    'coords': {dim: np.asarray(x).tolist() for dim, x in coords.items()}}
+        data = np.lib.format.open_memmap(store + '.npy', mode = 'w+', dtype = dtype, \
+                                         shape = (nRows,) + rowShape)
+        writeManifest(store, manifest)
+    block    = manifest['blockRows']
+
+    for start in range(0, nRows, block):
+        if start in manifest['done']:
+            continue
+        stop = min(start + block, nRows)
+        rows = dict(axes)
+        if len(shape) > 0:
+            first       = list(axes)[0]
+            rows[first] = axes[first][start:stop]
+        data[start:stop] = runScenarios(evalGrid, stop-start, rowShape, \
+                                        args = (rows, fixed, outputs, months), \
+                                        kwargs = {'taxCredits': taxCredits, 'dtype': dtype}, \
+                                        nWorkers = nWorkers, chunkSize = step, dtype = dtype)
+        data.flush()
+        manifest['done'].append(start)
+        writeManifest(store, manifest)
+    del data
+    return openSweep(store)
+
+def openSweep(store):
+    """ Sweep store as a labeledArray over a read-only memory map, so only
+    the selected parts are read from disk. 
+    """
+    with open(store + '.json') as file:
+        manifest = json.load(file)
+    data   = np.load(store + '.npy', mmap_mode = 'r')
+    coords = manifest['coords']
+    shape  = tuple(len(coords[dim]) for dim in manifest['dims'])
+    nRows  = len(range(0, np.shape(data)[0], manifest['blockRows']))
+    if len(manifest['done']) < nRows:
+        logging.error(f'sweep:openSweep:: {store} is missing {nRows - len(manifest["done"])} blocks.')
+    return labeledArray(data.reshape(shape), manifest['dims'], coords)
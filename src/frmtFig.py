@@ -5,7 +5,10 @@ Code for formatting figures
 Created:    Swarnav Banik  on  Feb 13, 2024
 """
 
-def frmtFig(mpl, plt, FS_title = 20, FS_tickLabel = 20, FS_axisLabel = 20):
+def getFigStyle(FS_title = 20, FS_tickLabel = 20, FS_axisLabel = 20):
+    """ Colors of the points and the rcParams of the figure format, to apply
+    globally (frmtFig) or per figure (matplotlib.style.context).
+    """
     # Colors ##################################################################
     clrBckg = (5/100,10/100,20/100)
     clrText = (1,1,1)
@@ -16,30 +19,35 @@ def frmtFig(mpl, plt, FS_title = 20, FS_tickLabel = 20, FS_axisLabel = 20):
     clrPts5 = (90/100,30/100, 0/100)
     clrPts  = [clrPts1, clrPts2, clrPts3, clrPts4, clrPts5]
 
-    mpl.rcdefaults()
+    style = {}
     # Set figure font sizes ###################################################
-    mpl.rcParams['axes.labelsize']  = FS_axisLabel
-    mpl.rcParams['xtick.labelsize'] = FS_tickLabel
-    mpl.rcParams['ytick.labelsize'] = FS_tickLabel
-    mpl.rcParams['legend.fontsize'] = FS_axisLabel
-    mpl.rcParams['axes.titlesize']  = FS_title
-    plt.rc('figure', titlesize = FS_title)
-    plt.rcParams['text.color'] = clrText
+    style['axes.labelsize']  = FS_axisLabel
+    style['xtick.labelsize'] = FS_tickLabel
+    style['ytick.labelsize'] = FS_tickLabel
+    style['legend.fontsize'] = FS_axisLabel
+    style['axes.titlesize']  = FS_title
+    style['figure.titlesize'] = FS_title
+    style['text.color'] = clrText
     # Set the figure color ####################################################
-    mpl.rcParams['axes.facecolor'] = clrBckg
-    mpl.rcParams['axes.edgecolor'] = clrText
-    mpl.rcParams['axes.labelcolor'] = clrText
-    mpl.rcParams['xtick.color'] = clrText
-    mpl.rcParams['ytick.color'] = clrText
-    mpl.rcParams['figure.facecolor'] = clrBckg
+    style['axes.facecolor'] = clrBckg
+    style['axes.edgecolor'] = clrText
+    style['axes.labelcolor'] = clrText
+    style['xtick.color'] = clrText
+    style['ytick.color'] = clrText
+    style['figure.facecolor'] = clrBckg
     # Set the grid ############################################################
-    mpl.rcParams['grid.color'] = clrText
-    mpl.rcParams['grid.alpha'] = 0.4
-    mpl.rcParams['grid.linewidth'] = 0.8
+    style['grid.color'] = clrText
+    style['grid.alpha'] = 0.4
+    style['grid.linewidth'] = 0.8
     # Set Legend properties ###################################################
-    mpl.rcParams['legend.frameon'] = False
-    mpl.rcParams['legend.title_fontsize'] = FS_axisLabel
-        
+    style['legend.frameon'] = False
+    style['legend.title_fontsize'] = FS_axisLabel
+    return clrPts, style
+
+def frmtFig(mpl, plt, FS_title = 20, FS_tickLabel = 20, FS_axisLabel = 20):
+    clrPts, style = getFigStyle(FS_title, FS_tickLabel, FS_axisLabel)
+    mpl.rcdefaults()
+    mpl.rcParams.update(style)
     mpl.rcParams.update(mpl.rcParams)
     
     return clrPts, mpl, plt
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""
+###############################################################################
+Tests of the split optimizer of incomeDist.
+###############################################################################
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.financialTools.investments import incomeDist
+from src.financialTools.allocation import optimizeSplits
+
+def checkSplit(dist, split, **kw):
+    assert np.all(split.stocks_splitRatio + split.cd_splitRatio <= 1)
+    check = incomeDist(stocks_splitRatio = split.stocks_splitRatio, cd_splitRatio = split.cd_splitRatio, **kw)
+    np.testing.assert_allclose(check.portfolio.value_CIP[..., -1], split.value, rtol = 1E-12)
+
+def test_splitFeedsIncomeDist():
+    # The volatile cap puts the optimum on stocks + cd = 1
+    for glidePath in [False, True]:
+        kw    = {'annualIncome': 200E3, 'term_years': 20}
+        split = optimizeSplits(incomeDist(**kw), glidePath = glidePath, maxVolatileFrac = 0.6, gridSize = 6)
+        checkSplit(incomeDist(**kw), split, **kw)
+
+def test_batch():
+    kw    = {'annualIncome': np.array([[150E3], [200E3]]), 'term_years': 20}
+    split = optimizeSplits(incomeDist(**kw), maxVolatileFrac = 0.6)
+    checkSplit(incomeDist(**kw), split, **kw)
+    for ii, income in enumerate([150E3, 200E3]):
+        single = optimizeSplits(incomeDist(income, term_years = 20), maxVolatileFrac = 0.6)
+        np.testing.assert_allclose(split.value[ii], single.value)
@@ -0,0 +1,47 @@
+"""
+###############################################################################
+Tests of the mortgage schedule against the original monthly loop.
+###############################################################################
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.financialTools.houseOwnCost import amortSchedule, homeOwnership
+
+def loopBankCost(housePrice, downPay, mortgageRate, mortgageTerm):
+    """ getBankCost as it was before the closed form, one mortgage at a time. """
+    cost_PM_bank  = (housePrice - downPay)*(mortgageRate/12)\
+        /( 1 - ( 1 + (mortgageRate/12) )**(-mortgageTerm*12) )
+    cost_PM_prnc  = np.zeros((mortgageTerm*12+1,))
+    cost_PM_debt  = np.zeros((mortgageTerm*12+1,))
+    equity_CM_frc = np.ones((mortgageTerm*12+1,))*downPay/housePrice
+    for ii in range(1, mortgageTerm*12+1):
+        cost_PM_debt[ii]  = (mortgageRate/12)*(housePrice - downPay - np.sum(cost_PM_prnc[0:ii]))
+        cost_PM_prnc[ii]  = cost_PM_bank - cost_PM_debt[ii]
+        equity_CM_frc[ii] = equity_CM_frc[ii] + np.sum(cost_PM_prnc[0:ii+1])/housePrice
+    return cost_PM_prnc, cost_PM_debt, equity_CM_frc
+
+def test_amortSchedule():
+    housePrice = np.array([[0.5E6], [1.2E6], [3E6]])
+    downPay    = 0.2*housePrice
+    rates      = np.array([0.5, 3, 6.5, 12])/100
+    for term in [1, 15, 30, 40]:
+        batch = amortSchedule(housePrice, downPay, rates, term)
+        for ii, jj in np.ndindex(3, len(rates)):
+            expected = loopBankCost(housePrice[ii, 0], downPay[ii, 0], rates[jj], term)
+            for x, y in zip(batch, expected):
+                np.testing.assert_allclose(x[ii, jj], y, rtol = 1E-9, atol = 1E-6)
+
+def test_homeOwnership():
+    house    = homeOwnership(1.2E6, 2.4E5, 6.5/100, mortgageTerm = 30)
+    expected = loopBankCost(1.2E6, 2.4E5, 6.5/100, 30)
+    for x, y in zip([house.cost_PM_prnc, house.cost_PM_debt, house.equity_CM_frc], expected):
+        np.testing.assert_allclose(x, y, rtol = 1E-9, atol = 1E-6)
+
+def test_zeroRate():
+    prnc, debt, equity = amortSchedule(1E6, 2E5, 0, 10)
+    np.testing.assert_allclose(prnc[1:], 8E5/120)
+    np.testing.assert_array_equal(debt, 0)
+    np.testing.assert_allclose(equity[[0, -1]], [0.2, 1])
@@ -0,0 +1,70 @@
+"""
+###############################################################################
+Tests of the income tax schedules against the original scalar code.
+###############################################################################
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.financialTools.incomeTax import getIncomeTaxHorizon, incomeTax, ssTax_FY2023, mcTax_FY2023, \
+                                         TAX_SCHEDULES
+from src.financialTools.houseOwnCost import homeOwnership
+
+def loopIncomeTax(income, stdDeductions, addDeductions, brackets_bp, brackets_pc):
+    """ incomeTax as it was before the bracket table, one income at a time.
+    Returns the taxed income, tax and marginal bracket (%).
+    """
+    taxedIncome = max(income - max(stdDeductions, addDeductions), 0)
+    if not taxedIncome < brackets_bp[0]:
+        if taxedIncome > brackets_bp[-1]:
+            idx_last = len(brackets_bp)-1
+        else:
+            bool_list    = taxedIncome/brackets_bp < 1
+            true_indices = [index for index, value in enumerate(bool_list) if value]
+            idx_last     = true_indices[0]-1
+        tax = brackets_bp[0]*brackets_pc[0]/100
+        for ii in range(1, idx_last+1):
+            tax = tax + (brackets_bp[ii]-brackets_bp[ii-1])*brackets_pc[ii]/100
+        tax       = tax + (taxedIncome-brackets_bp[idx_last])*brackets_pc[idx_last+1]/100
+        bracketPC = brackets_pc[idx_last+1]
+    else:
+        tax       = taxedIncome*brackets_pc[0]/100
+        bracketPC = brackets_pc[0]
+    return taxedIncome, tax, bracketPC
+
+def test_incomeTax():
+    for schedule in TAX_SCHEDULES.values():
+        bp, pc = np.array(schedule['brackets_bp'], dtype = float), np.array(schedule['brackets_pc'], dtype = float)
+        std    = schedule['stdDeductions']
+        for addDeductions in [0, 30E3]:
+            # Incomes on and around every breakpoint. The scalar code raises
+            # IndexError on the last breakpoint, and above it unless the 
+            # schedule has a rate there #####################################
+            deduct = max(std, addDeductions)
+            income = np.concatenate((np.linspace(1, 1.2*bp[-1] + deduct, 997), bp + deduct, \
+                                     bp + deduct - 1, bp + deduct + 1))
+            income = income[(income - deduct < bp[-1]) | ((income - deduct > bp[-1]) & (len(pc) > len(bp)))]
+            tax = incomeTax(income, stdDeductions = std, addDeductions = addDeductions, \
+                            brackets_bp = bp, brackets_pc = pc)
+            expected = np.array([loopIncomeTax(x, std, addDeductions, bp, pc) for x in income])
+            np.testing.assert_allclose(tax.taxedIncome, expected[:, 0])
+            np.testing.assert_allclose(tax.tax, expected[:, 1], rtol = 1E-12, atol = 1E-9)
+            np.testing.assert_array_equal(tax.bracketPC, expected[:, 2])
+            np.testing.assert_allclose(tax.effTaxRate, expected[:, 1]/income, rtol = 1E-12, atol = 1E-15)
+            scalar = incomeTax(income[500], stdDeductions = std, addDeductions = addDeductions, \
+                               brackets_bp = bp, brackets_pc = pc)
+            assert np.ndim(scalar.tax) == 0 and scalar.tax == tax.tax[500]
+
+def test_payrollTax():
+    income = np.linspace(0, 300E3, 31)
+    np.testing.assert_allclose(ssTax_FY2023(income).tax, [min(6.2/100*x, 147E3*6.2/100) for x in income])
+    np.testing.assert_allclose(mcTax_FY2023(income).tax, [1.45/100*x for x in income])
+
+def test_noFullTaxYear():
+    # A one year mortgage has no year of deductions to save taxes on
+    tax = getIncomeTaxHorizon(np.zeros((3, 0)), [])
+    assert all(np.shape(x) == (3, 0) for x in tax)
+    house = homeOwnership(1.5E6, 3E5, 6.5/100, mortgageTerm = 1, taxYear = 2024)
+    np.testing.assert_array_equal(house.taxSavings_PM, 0)
@@ -0,0 +1,39 @@
+"""
+###############################################################################
+Tests of the investment growth kernel against the original recurrence.
+###############################################################################
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.financialTools.investments import compoundGrowth, investment
+
+def loopGrowth(prnc, invstAppRate):
+    """ investment.value_CIP as it was before compoundGrowth, for one stream
+    of contributions and a rate that is a scalar or one per period.
+    """
+    rate      = np.broadcast_to(invstAppRate, np.shape(prnc))
+    value_CIP = np.zeros(np.shape(prnc))
+    value_CIP[0] = prnc[0]
+    for ii in range(1, len(prnc)):
+        value_CIP[ii] = value_CIP[ii-1]*(1 + rate[ii]) + prnc[ii]
+    return value_CIP
+
+def test_compoundGrowth():
+    rng  = np.random.default_rng(0)
+    prnc = rng.uniform(-1E3, 5E3, (3, 4, 481))
+    for rate in [0, 6.9/100/12, rng.uniform(-0.02, 0.03, (4, 481)), rng.uniform(-0.02, 0.03, (3, 4, 481))]:
+        value = compoundGrowth(prnc, rate)
+        for ii, jj in np.ndindex(3, 4):
+            x = rate if np.ndim(rate) == 0 else rate[..., jj, :] if np.ndim(rate) == 2 else rate[ii, jj]
+            np.testing.assert_allclose(value[ii, jj], loopGrowth(prnc[ii, jj], x), rtol = 1E-10, atol = 1E-6)
+
+def test_investment():
+    prnc  = np.concatenate(([1E4], 1E3*np.ones((360,))))
+    invst = investment(prnc, invstAppRate = 6.9/100/12)
+    np.testing.assert_allclose(invst.value_CIP, loopGrowth(prnc, 6.9/100/12), rtol = 1E-12)
+    np.testing.assert_allclose(invst.profit_CIP, invst.value_CIP - prnc.cumsum())
+    batch = investment(np.stack([prnc, 2*prnc]), invstAppRate = 6.9/100/12)
+    np.testing.assert_allclose(batch.value_CIP[1], 2*invst.value_CIP, rtol = 1E-12)
@@ -0,0 +1,47 @@
+"""
+###############################################################################
+Tests of the Monte Carlo estimates of renting v/s buying.
+###############################################################################
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.financialTools.houseOwnCost import rentVSbuy, breakEvenMonth
+from src.financialTools.investments import incomeDist
+from src.financialTools.monteCarlo import simulateRentVSbuy, simulatePortfolio
+
+def test_breakEvenMonth():
+    cost = np.array([[0, 1, -1, 2, -1, -2], [0, -1, -1, -1, -1, -1], [0, 1, -1, -2, 1, 3]])
+    np.testing.assert_array_equal(breakEvenMonth(cost), [4, 1, np.nan])
+
+def test_neverBreaksEven():
+    # The deterministic model never breaks even, so neither does the median path
+    model  = rentVSbuy(1.5E6, 3E5, 4050, mortgageRate = 6.5/100, annualIncome = 500E3)
+    result = simulateRentVSbuy(model, nPaths = 1000, seed = 0)
+    assert np.isnan(model.brekEvenPoint)
+    assert result.getBand('unrecoverCost_CM', 50)[-1] > 0
+    assert np.mean(~np.isnan(result.breakEven_M)) < 0.5
+    assert result.breakEven_CDF[-1] == np.mean(~np.isnan(result.breakEven_M))
+    assert np.all(np.diff(result.breakEven_CDF) >= 0)
+
+def test_batch():
+    rates  = np.array([3, 6.5])/100
+    batch  = simulateRentVSbuy(rentVSbuy(1.5E6, 3E5, 4050, mortgageRate = rates, annualIncome = 500E3), \
+                               nPaths = 200, seed = 0, chunkSize = 64)
+    assert np.shape(batch.unrecoverCost_CM) == (5, 2, 361)
+    for ii, rate in enumerate(rates):
+        single = simulateRentVSbuy(rentVSbuy(1.5E6, 3E5, 4050, mortgageRate = rate, annualIncome = 500E3), \
+                                   nPaths = 200, seed = 0, chunkSize = 64)
+        np.testing.assert_allclose(batch.unrecoverCost_CM[:, ii], single.unrecoverCost_CM)
+        np.testing.assert_array_equal(batch.breakEven_M[ii], single.breakEven_M)
+
+def test_batchPortfolio():
+    incomes = np.array([[100E3], [200E3]])
+    batch   = simulatePortfolio(incomeDist(incomes).portfolio, nPaths = 200, seed = 0, chunkSize = 64)
+    assert np.shape(batch.value_CIP) == (5, 2, 361)
+    for ii, income in enumerate(incomes[:, 0]):
+        single = simulatePortfolio(incomeDist(income).portfolio, nPaths = 200, seed = 0, chunkSize = 64)
+        for name in single.bands:
+            np.testing.assert_allclose(getattr(batch, name)[:, ii], getattr(single, name))
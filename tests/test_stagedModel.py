@@ -0,0 +1,63 @@
+"""
+###############################################################################
+Tests of the staged models: withParams against fresh models.
+###############################################################################
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.financialTools.houseOwnCost import homeOwnership, renting, rentVSbuy
+
+HOUSE  = {'housePrice': 1.2E6, 'downPay': 2.4E5, 'mortgageRate': 6.5/100}
+RENTAL = {'startRent': 4050}
+BUY    = {'housePrice': 1.2E6, 'downPay': 2.4E5, 'startRent': 4050}
+# New value of every parameter a model can take in withParams ################
+CHANGES = {homeOwnership: (HOUSE, {'housePrice': 1.5E6, 'downPay': 3E5, 'mortgageRate': 4/100, \
+                                   'propTaxRate': 1.2/100, 'maintainRate': 2/100, 'realEstateAppRate': 3/100, \
+                                   'invstAppRate': 5/100, 'taxCredits': False, 'taxStatus': 'single', \
+                                   'annualIncome': 250E3, 'taxYear': 2024}),
+           renting:       (RENTAL, {'startRent': 5000, 'rentAppRate': 2/100, 'invstAppRate': 5/100}),
+           rentVSbuy:     (BUY, {'housePrice': 1.5E6, 'downPay': 3E5, 'startRent': 5000, 'mortgageRate': 4/100, \
+                                 'propTaxRate': 1.2/100, 'maintainRate': 2/100, 'realEstateAppRate': 3/100, \
+                                 'rentAppRate': 2/100, 'invstAppRate': 5/100, 'taxCredits': False, \
+                                 'annualIncome': 250E3, 'taxYear': 2024})}
+FIXED   = {homeOwnership: 'mortgageTerm', renting: 'rentTerm', rentVSbuy: 'term'}
+
+def assertSameModel(model, fresh):
+    series, expected = model.getSeries(), fresh.getSeries()
+    assert sorted(series) == sorted(expected)
+    for name in expected:
+        np.testing.assert_allclose(series[name], expected[name], rtol = 1E-12, err_msg = name)
+    if isinstance(fresh, rentVSbuy):
+        np.testing.assert_allclose([model.buyLoss, model.brekEvenPoint], [fresh.buyLoss, fresh.brekEvenPoint])
+
+@pytest.mark.parametrize('cls', list(CHANGES))
+@pytest.mark.parametrize('lazy', [False, True])
+def test_withParams(cls, lazy):
+    base, changes = CHANGES[cls]
+    for name, value in changes.items():
+        model = cls(**base, lazy = lazy)
+        if lazy:
+            model.unrecoverCost_CM
+        assertSameModel(model.withParams(**{name: value}), cls(**{**base, name: value}))
+        assertSameModel(model, cls(**base))
+
+def test_sharedChildren():
+    model   = rentVSbuy(**BUY)
+    renter  = model.withParams(rentAppRate = 2/100)
+    assert renter.house is model.house and renter.house_noTC is model.house_noTC
+    assert renter.rental is not model.rental
+    buyer   = model.withParams(annualIncome = 250E3)
+    assert buyer.rental is model.rental and buyer.house_noTC is model.house_noTC
+    assert buyer.house is not model.house
+
+@pytest.mark.parametrize('cls', list(FIXED))
+def test_fixedParams(cls):
+    model = cls(**CHANGES[cls][0])
+    with pytest.raises(AttributeError):
+        model.withParams(**{FIXED[cls]: 20})
+    with pytest.raises(AttributeError):
+        setattr(model, FIXED[cls], 20)